@@ -0,0 +1,43 @@
+import gc
+import json
+import random
+import time
+import tracemalloc
+from benchmark_streaming_parse import make_page
+from document_parser import extract_text_and_tables
+from document_model import ParsedDocument
+from text_chunker import chunk_text
+
+def traced_size(build):
+    """Return (object, MB still allocated after build() returns)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size / 1024 ** 2
+
+def main():
+    print(f"{'pages':>6} {'form':>8} {'memory (MB)':>12} {'chunk time (s)':>15}")
+    for num_pages in (500, 1000, 2000):
+        rng = random.Random(num_pages)
+        # Serialize and reload, so the dict form is measured exactly as a JSON load produces it
+        raw = json.dumps([{"job_id": "benchmark", "pages": [make_page(i + 1, rng) for i in range(num_pages)]}])
+
+        dict_form, dict_size = traced_size(lambda: json.loads(raw))
+        compact_form, compact_size = traced_size(lambda: ParsedDocument.from_json(json.loads(raw)))
+
+        start = time.perf_counter()
+        chunk_text(extract_text_and_tables(dict_form), min_chunk_size=1000, max_chunk_size=5000)
+        dict_time = time.perf_counter() - start
+        start = time.perf_counter()
+        chunk_text(compact_form, min_chunk_size=1000, max_chunk_size=5000)
+        compact_time = time.perf_counter() - start
+
+        print(f"{num_pages:>6} {'dict':>8} {dict_size:>12.1f} {dict_time:>15.3f}")
+        print(f"{num_pages:>6} {'compact':>8} {compact_size:>12.1f} {compact_time:>15.3f}")
+        del dict_form, compact_form
+
+if __name__ == "__main__":
+    main()
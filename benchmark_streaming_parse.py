@@ -0,0 +1,72 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from document_parser import extract_text_and_tables, iter_pages, iter_text_and_tables, write_pages_ndjson
+from text_chunker import chunk_text, iter_chunks
+
+WORDS = ("revenue growth market host guest listing booking city travel platform "
+         "investment founder community design review trust payment season").split()
+
+def make_page(page_number, rng):
+    """Build one synthetic page shaped like a LlamaParse page record."""
+    items = [{"type": "heading", "lvl": 2, "value": f"Section {page_number}", "md": f"## Section {page_number}"}]
+    for _ in range(8):
+        value = " ".join(rng.choice(WORDS) for _ in range(90)) + "."
+        items.append({"type": "text", "value": value, "md": value})
+    if page_number % 3 == 0:
+        rows = [["Year", "Hosts", "Revenue"]] + [[str(2000 + i), str(rng.randint(1, 10 ** 6)), f"${rng.randint(1, 999)}M"] for i in range(10)]
+        items.append({"type": "table", "rows": rows, "md": "\n".join(" | ".join(row) for row in rows)})
+    text = "\n\n".join(item.get("md", "") for item in items)
+    return {"page": page_number, "text": text, "md": text, "images": [], "items": items}
+
+def write_synthetic_parse(directory, num_pages):
+    """Write the same synthetic document as a legacy indented JSON file and as NDJSON."""
+    rng = random.Random(num_pages)
+    pages = [make_page(i + 1, rng) for i in range(num_pages)]
+    json_path = os.path.join(directory, f"parsed_{num_pages}.json")
+    ndjson_path = os.path.join(directory, f"parsed_{num_pages}.ndjson")
+    with open(json_path, 'w') as f:
+        json.dump([{"job_id": "benchmark", "pages": pages}], f, indent=2)
+    write_pages_ndjson(pages, ndjson_path)
+    return json_path, ndjson_path
+
+def run_in_memory(json_path):
+    with open(json_path, 'r') as f:
+        json_result = json.load(f)
+    text = extract_text_and_tables(json_result)
+    return len(chunk_text(text, min_chunk_size=1000, max_chunk_size=5000))
+
+def run_streaming(ndjson_path):
+    chunks = iter_chunks(iter_text_and_tables(iter_pages(ndjson_path)), min_chunk_size=1000, max_chunk_size=5000)
+    return sum(1 for _ in chunks)
+
+def measure(function, path):
+    """Run one pipeline and return (chunk count, seconds, peak traced memory in MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    num_chunks = function(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return num_chunks, elapsed, peak / 1024 ** 2
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"{'pages':>6} {'pipeline':>10} {'file (MB)':>10} {'chunks':>7} {'time (s)':>9} {'peak (MB)':>10}")
+        for num_pages in (500, 1000, 2000):
+            json_path, ndjson_path = write_synthetic_parse(directory, num_pages)
+            for name, function, path in (("in-memory", run_in_memory, json_path),
+                                         ("streaming", run_streaming, ndjson_path)):
+                num_chunks, elapsed, peak = measure(function, path)
+                size = os.path.getsize(path) / 1024 ** 2
+                print(f"{num_pages:>6} {name:>10} {size:>10.1f} {num_chunks:>7} {elapsed:>9.2f} {peak:>10.1f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import json
+import time
+from document_parser import iter_text_and_tables
+from parse_cache import get_parsed_document, iter_cached_pages
+from summary_context import CONTEXT_MODES
+from text_chunker import iter_token_chunks
+from tools import PresentationSummarizer
+
+def run_mode(chunks, mode, context_tokens):
+    """Summarize the chunks in order with one context mode and total its token usage and latency."""
+    summarizer = PresentationSummarizer(context_mode=mode, context_tokens=context_tokens)
+    start = time.perf_counter()
+    failures = 0
+    for i, chunk in enumerate(chunks):
+        try:
+            summarizer.summarize_text(chunk, chunks[i - 1] if i > 0 else None)
+        except ValueError as e:
+            failures += 1
+            print(f"[{mode}] chunk {i + 1}: {e}")
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "chunks": len(chunks),
+        "failed_chunks": failures,
+        "prompt_tokens": sum(call["prompt_tokens"] or 0 for call in summarizer.usage_log),
+        "completion_tokens": sum(call["completion_tokens"] or 0 for call in summarizer.usage_log),
+        "latency": elapsed,
+        "mean_call_latency": sum(call["latency"] for call in summarizer.usage_log) / max(len(summarizer.usage_log), 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare summarizer context modes on the same document.")
+    parser.add_argument("document", help="Document to summarize (the cached parse is reused)")
+    parser.add_argument("--modes", nargs="+", default=list(CONTEXT_MODES), choices=CONTEXT_MODES)
+    parser.add_argument("--limit", type=int, default=10, help="Number of chunks to summarize per mode")
+    parser.add_argument("--max-chunk-tokens", type=int, default=1200)
+    parser.add_argument("--context-tokens", type=int, default=300)
+    parser.add_argument("--output", default="summarizer_context_report.json")
+    args = parser.parse_args()
+
+    entry_dir = get_parsed_document(args.document)
+    chunks = list(iter_token_chunks(iter_text_and_tables(iter_cached_pages(entry_dir)), max_tokens=args.max_chunk_tokens))[:args.limit]
+
+    results = [run_mode(chunks, mode, args.context_tokens) for mode in args.modes]
+    baseline = next((result["prompt_tokens"] for result in results if result["mode"] == "full"), None)
+
+    print(f"\n{'mode':>9} {'prompt tok':>11} {'vs full':>8} {'completion':>11} {'total (s)':>10} {'per call (s)':>13}")
+    for result in results:
+        relative = f"{result['prompt_tokens'] / baseline:.0%}" if baseline else "-"
+        print(f"{result['mode']:>9} {result['prompt_tokens']:>11} {relative:>8} {result['completion_tokens']:>11} "
+              f"{result['latency']:>10.1f} {result['mean_call_latency']:>13.2f}")
+
+    with open(args.output, 'w') as f:
+        json.dump({"document": args.document, "results": results}, f, indent=2)
+    print(f"Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import random
+import time
+from text_chunker import get_token_counter, iter_chunks, iter_token_chunks
+
+WORDS = ("revenue growth market host guest listing booking city travel platform "
+         "investment founder community design review trust payment season").split()
+
+def item_words(text_items):
+    """All whitespace-separated words of the input, in order, with tables flattened as the chunkers do."""
+    for item in text_items:
+        if isinstance(item, list):
+            item = '\n'.join(' | '.join(str(cell) for cell in row) for row in item)
+        yield from item.split()
+
+def make_items(num_pages, rng):
+    """Synthetic text and table items shaped like iter_text_and_tables output."""
+    items = []
+    for page_number in range(1, num_pages + 1):
+        items.append(f"Section {page_number}")
+        for _ in range(8):
+            items.append(" ".join(rng.choice(WORDS) for _ in range(90)) + ".")
+        if page_number % 3 == 0:
+            items.append([["Year", "Hosts", "Revenue"]] + [[str(2000 + i), str(rng.randint(1, 10 ** 6)), f"${rng.randint(1, 999)}M"] for i in range(10)])
+    return items
+
+def main():
+    count_tokens = get_token_counter()
+    print(f"{'input (MB)':>10} {'chunker':>8} {'chunks':>7} {'time (s)':>9} {'MB/s':>7} {'dropped words':>14}")
+    for num_pages in (1000, 2000, 4000):
+        items = make_items(num_pages, random.Random(num_pages))
+        size = sum(len(word) + 1 for word in item_words(items)) / 1024 ** 2
+        num_words = sum(1 for _ in item_words(items))
+        for name, chunker in (("chars", lambda: iter_chunks(items, min_chunk_size=1000, max_chunk_size=5000)),
+                              ("tokens", lambda: iter_token_chunks(items, max_tokens=1200, min_tokens=250, count_tokens=count_tokens))):
+            start = time.perf_counter()
+            chunks = list(chunker())
+            elapsed = time.perf_counter() - start
+            dropped = num_words - sum(len(chunk.split()) for chunk in chunks)
+            print(f"{size:>10.1f} {name:>8} {len(chunks):>7} {elapsed:>9.3f} {size / elapsed:>7.1f} {dropped:>14}")
+
+if __name__ == "__main__":
+    main()
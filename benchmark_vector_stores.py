@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+import time
+import zlib
+from typing import List
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+from vector_store import NumpyVectorStore
+
+EMBEDDING_DIM = 768  # all-mpnet-base-v2
+CHROMA_BATCH_SIZE = 5000
+
+class RandomEmbeddings(Embeddings):
+    """Deterministic random embeddings so the benchmark measures the stores, not the model."""
+
+    def _embed(self, text: str) -> List[float]:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        return rng.standard_normal(EMBEDDING_DIM, dtype=np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+def benchmark_backend(backend, num_chunks, num_queries=100):
+    """
+    Time store initialization, ingestion of num_chunks precomputed vectors and exact top-3 queries.
+
+    Returns:
+        dict: init, ingest and mean query latency in seconds
+    """
+    embeddings = RandomEmbeddings()
+    texts = [f"chunk {i}" for i in range(num_chunks)]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    metadatas = [{"source": "benchmark", "chunk_id": f"benchmark_{i}"} for i in range(num_chunks)]
+    queries = [embeddings.embed_query(f"query {i}") for i in range(num_queries)]
+    persist_directory = tempfile.mkdtemp()
+
+    try:
+        start = time.perf_counter()
+        if backend == "chroma":
+            store = Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+        else:
+            store = NumpyVectorStore(embedding_function=embeddings)
+        init_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if backend == "chroma":
+            for i in range(0, num_chunks, CHROMA_BATCH_SIZE):
+                store._collection.add(
+                    ids=[str(j) for j in range(i, min(i + CHROMA_BATCH_SIZE, num_chunks))],
+                    embeddings=vectors[i:i + CHROMA_BATCH_SIZE].tolist(),
+                    documents=texts[i:i + CHROMA_BATCH_SIZE],
+                    metadatas=metadatas[i:i + CHROMA_BATCH_SIZE]
+                )
+        else:
+            store.add_vectors(vectors, texts, metadatas)
+        ingest_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in queries:
+            store.similarity_search_by_vector_with_relevance_scores(query, k=3)
+        query_time = (time.perf_counter() - start) / num_queries
+
+        return {"init": init_time, "ingest": ingest_time, "query": query_time}
+    finally:
+        shutil.rmtree(persist_directory, ignore_errors=True)
+
+def main():
+    print(f"{'chunks':>8} {'backend':>8} {'init (ms)':>10} {'ingest (s)':>11} {'query (ms)':>11}")
+    for num_chunks in (1_000, 10_000, 100_000):
+        for backend in ("chroma", "numpy"):
+            result = benchmark_backend(backend, num_chunks)
+            print(f"{num_chunks:>8} {backend:>8} {result['init'] * 1000:>10.1f} "
+                  f"{result['ingest']:>11.2f} {result['query'] * 1000:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Set, Tuple
+from minhash import LSHIndex, MinHasher
+from text_chunker import estimate_tokens
+
+DIGITS_PATTERN = re.compile(r"\d+")
+# Table-of-contents entries: a title followed by dot leaders or wide spacing and a page number
+TOC_LINE_PATTERN = re.compile(r"^.{3,}?(?:\.{4,}|\s{3,}|\t+)\s*(\d{1,4})$")
+DOT_LEADER_PATTERN = re.compile(r"\.{4,}\s*\d{1,4}$")
+# Wide spacing before a number is also how body text lays out "Serves    4", so such
+# lines only count as a table of contents in a run of this many with ascending page numbers
+TOC_MIN_RUN = 3
+
+@dataclass
+class FilterReport:
+    """Savings from boilerplate and near-duplicate filtering of one document."""
+    document: str
+    repeated_lines: int = 0
+    lines_removed: int = 0
+    toc_lines_removed: int = 0
+    tokens_removed: int = 0
+    duplicate_chunks: List[Tuple[int, int, float]] = field(default_factory=list)  # (chunk, duplicate of, similarity)
+    duplicate_tokens: int = 0
+    baseline_chunks: int = 0
+    filtered_chunks: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_removed + self.duplicate_tokens
+
+    @property
+    def llm_calls_saved(self) -> int:
+        """One summarize_text call per chunk, so the saving is the difference in chunk counts."""
+        return self.baseline_chunks - self.filtered_chunks
+
+    def as_dict(self) -> dict:
+        return {
+            "document": self.document,
+            "repeated_lines": self.repeated_lines,
+            "lines_removed": self.lines_removed,
+            "toc_lines_removed": self.toc_lines_removed,
+            "duplicate_chunks": len(self.duplicate_chunks),
+            "baseline_chunks": self.baseline_chunks,
+            "filtered_chunks": self.filtered_chunks,
+            "tokens_saved": self.tokens_saved,
+            "llm_calls_saved": self.llm_calls_saved
+        }
+
+    def summary(self) -> str:
+        return (f"{self.document}: removed {self.lines_removed} boilerplate and {self.toc_lines_removed} table-of-contents lines, "
+                f"{len(self.duplicate_chunks)} near-duplicate chunks; saved ~{self.tokens_saved} tokens and "
+                f"{self.llm_calls_saved} LLM calls ({self.baseline_chunks} -> {self.filtered_chunks} chunks)")
+
+def normalize_line(line: str) -> str:
+    """Normalize a line so running headers and footers match across pages (e.g. "Page 3 of 40")."""
+    return " ".join(DIGITS_PATTERN.sub("#", line.lower()).split()).strip(" .-|")
+
+def _edge_lines(page: dict, edge_lines: int) -> List[Tuple[int, int, int, str]]:
+    """
+    The first and last edge_lines text lines of a page, where running headers and footers sit.
+    Headings are never candidates, top lines must come before the page's first heading
+    and bottom lines after its last one, so content under a heading is never an edge line.
+
+    Returns:
+        list: (position, item index, line index, line); position counts from the top (0, 1, ...)
+            or from the bottom (-1, -2, ...)
+    """
+    headings = [item_index for item_index, item in enumerate(page['items']) if item['type'] == 'heading']
+    lines = [(item_index, line_index, line)
+             for item_index, item in enumerate(page['items']) if item['type'] == 'text'
+             for line_index, line in enumerate(item['value'].splitlines()) if line.strip()]
+    top = [line for line in lines if not headings or line[0] < headings[0]][:edge_lines]
+    bottom = [line for line in lines if not headings or line[0] > headings[-1]][::-1][:edge_lines]
+    edges = [(position, *line) for position, line in enumerate(top)]
+    edges += [(-position - 1, *line) for position, line in enumerate(bottom) if line not in top]
+    return edges
+
+def _toc_lines(page: dict) -> Set[Tuple[int, int]]:
+    """
+    Table-of-contents lines of a page. A line with dot leaders is dropped on its own;
+    other TOC-like lines only inside a run of at least TOC_MIN_RUN consecutive ones
+    whose page numbers never decrease, so "Serves   4" or "Total revenue    2024"
+    in the body of a page are kept.
+
+    Returns:
+        Set[Tuple[int, int]]: (item index, line index) of each table-of-contents line
+    """
+    toc = set()
+    run = []  # (item index, line index, page number) of consecutive TOC-like lines
+
+    def close_run():
+        numbers = [number for _, _, number in run]
+        if len(run) >= TOC_MIN_RUN and numbers == sorted(numbers):
+            toc.update((item_index, line_index) for item_index, line_index, _ in run)
+        run.clear()
+
+    for item_index, item in enumerate(page['items']):
+        if item['type'] != 'text':
+            close_run()
+            continue
+        for line_index, line in enumerate(item['value'].splitlines()):
+            if not line.strip():
+                continue
+            match = TOC_LINE_PATTERN.match(line.strip())
+            if not match:
+                close_run()
+                continue
+            if DOT_LEADER_PATTERN.search(line.strip()):
+                toc.add((item_index, line_index))
+            run.append((item_index, line_index, int(match.group(1))))
+    close_run()
+    return toc
+
+def find_repeated_lines(pages: Iterable[dict], min_fraction: float = 0.6, min_pages: int = 3,
+                        edge_lines: int = 2) -> Set[Tuple[int, str]]:
+    """
+    Find running headers and footers: lines at the same position near the top or
+    bottom of most pages. Headings and lines in the body of a page are never
+    boilerplate, so recurring content such as "Ingredients" is kept.
+
+    Args:
+        pages (iterable): LlamaParse-style page dictionaries, e.g. from iter_cached_pages
+        min_fraction (float): Fraction of pages a line must appear on, at the same position, to count as boilerplate
+        min_pages (int): Documents with fewer pages than this are left untouched
+        edge_lines (int): Number of text lines at the top and at the bottom of each page to consider
+
+    Returns:
+        Set[Tuple[int, str]]: (position, normalized line) pairs; see _edge_lines for positions
+    """
+    position_counts = Counter()
+    num_pages = 0
+    for page in pages:
+        num_pages += 1
+        position_counts.update({(position, normalize_line(line)) for position, _, _, line in _edge_lines(page, edge_lines)
+                                if normalize_line(line)})
+    if num_pages < min_pages:
+        return set()
+    return {key for key, count in position_counts.items() if count >= max(min_pages, min_fraction * num_pages)}
+
+def strip_boilerplate(pages: Iterable[dict], repeated_lines: Set[Tuple[int, str]], report: FilterReport = None,
+                      count_tokens=estimate_tokens, edge_lines: int = 2) -> Iterator[dict]:
+    """
+    Remove boilerplate from pages: running headers and footers found by
+    find_repeated_lines are removed from the page edges (their first occurrence
+    is kept), and table-of-contents lines are dropped (see _toc_lines). Headings and
+    tables pass through.
+
+    Args:
+        pages (iterable): LlamaParse-style page dictionaries, e.g. from iter_cached_pages
+        repeated_lines (Set[Tuple[int, str]]): (position, normalized line) pairs from find_repeated_lines
+        report (FilterReport, optional): Report to record removed lines and tokens in
+        count_tokens (callable): str -> int token counter used for the report
+        edge_lines (int): Same value as passed to find_repeated_lines
+
+    Yields:
+        dict: Pages with boilerplate lines removed from their text items
+    """
+    seen = set()
+    for page in pages:
+        removed = set()  # (item index, line index)
+        for position, item_index, line_index, line in _edge_lines(page, edge_lines):
+            key = (position, normalize_line(line))
+            if key in repeated_lines:
+                if key in seen:
+                    removed.add((item_index, line_index))
+                    if report is not None:
+                        report.lines_removed += 1
+                        report.tokens_removed += count_tokens(line)
+                seen.add(key)
+        toc = _toc_lines(page)
+        items = []
+        for item_index, item in enumerate(page['items']):
+            if item['type'] != 'text':
+                items.append(item)
+                continue
+            kept = []
+            for line_index, line in enumerate(item['value'].splitlines()):
+                if (item_index, line_index) in removed:
+                    continue
+                if (item_index, line_index) in toc:
+                    if report is not None:
+                        report.toc_lines_removed += 1
+                        report.tokens_removed += count_tokens(line)
+                    continue
+                kept.append(line)
+            text = "\n".join(kept).strip()
+            if text:
+                items.append({**item, 'value': text})
+        yield {**page, 'items': items}
+
+def drop_near_duplicate_chunks(chunks: List[str], threshold: float = 0.85, report: FilterReport = None,
+                               count_tokens=estimate_tokens, hasher: MinHasher = None) -> List[str]:
+    """
+    Drop chunks whose shingles nearly match an earlier chunk (MinHash + LSH).
+
+    Args:
+        chunks (List[str]): Text chunks in document order
+        threshold (float): Estimated Jaccard similarity at which a chunk counts as a duplicate
+        report (FilterReport, optional): Report to record dropped chunks and tokens in
+        count_tokens (callable): str -> int token counter used for the report
+        hasher (MinHasher, optional): MinHash signer (a default one is created if not given)
+
+    Returns:
+        List[str]: Chunks with near-duplicates removed, first occurrences kept
+    """
+    hasher = hasher or MinHasher()
+    index = LSHIndex(threshold=threshold, num_perm=hasher.num_perm)
+    kept = []
+    for i, chunk in enumerate(chunks):
+        signature = hasher.signature(chunk)
+        matches = index.query(signature)
+        if matches:
+            if report is not None:
+                report.duplicate_chunks.append((i, matches[0][0], matches[0][1]))
+                report.duplicate_tokens += count_tokens(chunk)
+            continue
+        index.add(i, signature)
+        kept.append(chunk)
+    return kept
@@ -3,7 +3,7 @@ from pptx.util import Inches, Pt
 from pptx.enum.text import MSO_AUTO_SIZE
 import os
 
-def create_slide_from_content(template_path, output_path, slides_data):
+def create_slide_from_content(template_path, output_path, slides_data, catalog=None):
     """
     Create a presentation with multiple slides using the provided content and template.
     
@@ -11,6 +11,7 @@ def create_slide_from_content(template_path, output_path, slides_data):
         template_path (str): Path to the PowerPoint template (.pptx)
         output_path (str): Path where the new presentation will be saved
         slides_data (list): List of dictionaries containing slide content and layout information
+        catalog (ImageCatalog, optional): Image catalog used to resolve image paths
     """
     # Load the template
     prs = Presentation(template_path)
@@ -84,8 +85,11 @@ def create_slide_from_content(template_path, output_path, slides_data):
                 
                 # Handle image
                 elif item['content_type'] == 'image_path':
-                    image_path = './images/' + item['value']
-                    if os.path.exists(image_path):
+                    # Catalogued images are known to exist; only uncatalogued ones are probed on disk
+                    image_path = catalog.resolve_path(item['value']) if catalog is not None else None
+                    if image_path is None and os.path.exists('./images/' + item['value']):
+                        image_path = './images/' + item['value']
+                    if image_path is not None:
                         try:
                             left = shape.left
                             top = shape.top
@@ -95,7 +99,7 @@ def create_slide_from_content(template_path, output_path, slides_data):
                         except Exception as e:
                             print(f"⚠️ Error adding image: {str(e)}")
                     else:
-                        print(f"⚠️ Image not found: {image_path}")
+                        print(f"⚠️ Image not found: {item['value']}")
                 
                 # Handle speaker notes
                 elif item['content_type'] == 'speaker_notes':
@@ -0,0 +1,171 @@
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Union
+
+HEADING, TEXT, TABLE = 0, 1, 2
+ITEM_TYPES = ("heading", "text", "table")
+ITEM_CODES = {name: code for code, name in enumerate(ITEM_TYPES)}
+
+# Separators used to store table rows, and the table's markdown after them, in the shared text buffer
+CELL_SEPARATOR = "\x1f"
+ROW_SEPARATOR = "\x1e"
+MD_SEPARATOR = "\x1d"
+
+@dataclass(slots=True)
+class ImageInfo:
+    name: str
+    width: float
+    height: float
+    page: int
+    original_width: float = 0
+    original_height: float = 0
+
+class ParsedDocument:
+    """
+    Compact, column-oriented form of a parsed document.
+
+    Every heading, text and table item is one row across typed arrays (type,
+    page, heading level, start/end offsets), and all item text lives in one
+    shared string buffer. Table rows are stored in the buffer with control
+    separators, so cells come back as strings, followed by the table's markdown
+    when the parser provided one. Images are slotted dataclasses.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.item_types = array('b')
+        self.item_pages = array('i')
+        self.item_levels = array('b')
+        self.item_starts = array('q')
+        self.item_ends = array('q')
+        self.page_numbers = array('i')
+        self.page_item_starts = array('q')  # index of each page's first item
+        self.images: List[ImageInfo] = []
+
+    def __len__(self):
+        return len(self.item_types)
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[dict]) -> "ParsedDocument":
+        """
+        Build the compact form from page records, e.g. streamed by iter_pages.
+
+        Args:
+            pages (iterable): LlamaParse-style page dictionaries
+
+        Returns:
+            ParsedDocument: The compact document
+        """
+        document = cls()
+        parts = []
+        offset = 0
+        for page in pages:
+            document.page_numbers.append(page['page'])
+            document.page_item_starts.append(len(document.item_types))
+            for item in page['items']:
+                code = ITEM_CODES.get(item['type'])
+                if code is None:
+                    continue
+                if code == TABLE:
+                    value = ROW_SEPARATOR.join(CELL_SEPARATOR.join(str(cell) for cell in row) for row in item['rows'])
+                    if item.get('md'):
+                        value += MD_SEPARATOR + item['md']
+                else:
+                    value = item['value']
+                document.item_types.append(code)
+                document.item_pages.append(page['page'])
+                document.item_levels.append(item.get('lvl', 1) if code == HEADING else 0)  # same default as build_section_tree
+                document.item_starts.append(offset)
+                offset += len(value)
+                document.item_ends.append(offset)
+                parts.append(value)
+            for img in page.get('images', []):
+                document.images.append(ImageInfo(
+                    name=img['name'],
+                    width=img['width'],
+                    height=img['height'],
+                    page=page['page'],
+                    original_width=img.get('original_width', img['width']),
+                    original_height=img.get('original_height', img['height'])
+                ))
+        document.buffer = "".join(parts)
+        return document
+
+    @classmethod
+    def from_json(cls, document_content) -> "ParsedDocument":
+        """Build the compact form from a LlamaParse JSON result."""
+        return cls.from_pages(document_content[0]['pages'])
+
+    def item_type(self, index: int) -> str:
+        return ITEM_TYPES[self.item_types[index]]
+
+    def item_value(self, index: int) -> Union[str, List[List[str]]]:
+        """The text of a heading or text item, or the rows of a table item."""
+        value = self.buffer[self.item_starts[index]:self.item_ends[index]]
+        if self.item_types[index] == TABLE:
+            value = value.split(MD_SEPARATOR, 1)[0]
+            return [row.split(CELL_SEPARATOR) for row in value.split(ROW_SEPARATOR)] if value else []
+        return value
+
+    def item_md(self, index: int) -> str:
+        """The markdown of a table item as given by the parser, or "" if it had none."""
+        if self.item_types[index] != TABLE:
+            return ""
+        value = self.buffer[self.item_starts[index]:self.item_ends[index]]
+        return value.split(MD_SEPARATOR, 1)[1] if MD_SEPARATOR in value else ""
+
+    def iter_text_and_tables(self) -> Iterator[Union[str, List[List[str]]]]:
+        """Yield item values in document order, like document_parser.iter_text_and_tables."""
+        for index in range(len(self.item_types)):
+            yield self.item_value(index)
+
+    def iter_pages(self) -> Iterator[dict]:
+        """
+        Rebuild page records one at a time for code that expects the JSON form.
+        Only the page currently being read is materialized.
+
+        Yields:
+            dict: Page record with "page", "items" and "images"
+        """
+        images_by_page = {}
+        for image in self.images:
+            images_by_page.setdefault(image.page, []).append(image)
+        for page_index, page_number in enumerate(self.page_numbers):
+            first = self.page_item_starts[page_index]
+            last = self.page_item_starts[page_index + 1] if page_index + 1 < len(self.page_numbers) else len(self.item_types)
+            items = []
+            for index in range(first, last):
+                item = {"type": self.item_type(index)}
+                if self.item_types[index] == TABLE:
+                    item["rows"] = self.item_value(index)
+                    if self.item_md(index):
+                        item["md"] = self.item_md(index)
+                else:
+                    item["value"] = self.item_value(index)
+                    if self.item_types[index] == HEADING:
+                        item["lvl"] = self.item_levels[index]
+                items.append(item)
+            images = [
+                {
+                    "name": image.name,
+                    "width": image.width,
+                    "height": image.height,
+                    "original_width": image.original_width,
+                    "original_height": image.original_height
+                } for image in images_by_page.get(page_number, [])
+            ]
+            yield {"page": page_number, "items": items, "images": images}
+
+def document_pages(document_content) -> Iterable[dict]:
+    """
+    Page records of a document in either form.
+
+    Args:
+        document_content: A LlamaParse JSON result or a ParsedDocument
+
+    Returns:
+        iterable: Page dictionaries
+    """
+    if isinstance(document_content, ParsedDocument):
+        return document_content.iter_pages()
+    return document_content[0]['pages']
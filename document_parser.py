@@ -7,6 +7,8 @@ from llama_index.core import SimpleDirectoryReader
 from transformers import CLIPProcessor, CLIPModel
 import torch
 from dotenv import load_dotenv
+from local_parser import can_parse_locally, parse_local
+from document_model import ParsedDocument, document_pages
 
 
 load_dotenv()
@@ -39,57 +41,61 @@ def rename_image_files(job_id, images_dir="./images"):
 
     print("Finished renaming all files")
 
-def process_document(file_path, json_output_filename="document_parsed.json", image_download_dir="./images", save_json=True):
+def process_document(file_path, json_output_filename="document_parsed.ndjson", image_download_dir="./images", save_json=True,
+                     image_metadata_filename="image_metadata.json", language="en", backend="auto"):
     """
     Process a document to extract text and images.
     
     Args:
         file_path (str): Path to the document to process
-        json_output_filename (str): Name of the output JSON file
+        json_output_filename (str): Name of the output NDJSON file (one page per line)
         image_download_dir (str): Directory to save extracted images
+        save_json (bool): Whether to write the parsed pages and image metadata to disk
+        image_metadata_filename (str): Name of the output image metadata JSON file
+        language (str): Document language passed to LlamaParse
+        backend (str): "llamaparse", "local" (offline parser for digital PDFs and .docx),
+            or "auto" to parse locally when possible and fall back to LlamaParse for scanned input
         
     Returns:
         dict: JSON result containing parsed document data
     """
 
-    LLAMA_CLOUD_API_KEY = os.getenv("LLAMA_CLOUD_API_KEY")
-    # Initialize the parser with your API key
-    parser = LlamaParse(
-        api_key=LLAMA_CLOUD_API_KEY,
-        verbose=True,
-        language="en"
-    )
-    
-    # Parse document and get JSON result
-    json_result = parser.get_json_result(file_path)
-
-    # Create a more readable format with indentation
-    formatted_json = json.dumps(json_result, indent=2)
-
-    # Write to local file
-    with open('document_parsed.json', 'w') as f:
-        f.write(formatted_json)
+    use_local = backend == "local" or (backend == "auto" and can_parse_locally(file_path))
+    if use_local:
+        # Local parsing writes images straight to image_download_dir with final names
+        print(f"Parsing {file_path} locally")
+        json_result = parse_local(file_path, image_download_dir)
+    else:
+        LLAMA_CLOUD_API_KEY = os.getenv("LLAMA_CLOUD_API_KEY")
+        # Initialize the parser with your API key
+        parser = LlamaParse(
+            api_key=LLAMA_CLOUD_API_KEY,
+            verbose=True,
+            language=language
+        )
+        
+        # Parse document and get JSON result
+        json_result = parser.get_json_result(file_path)
 
-    print('**************************************************')
-    print("JSON data has been written to document_parsed.json")
-    print('**************************************************')
-    
     if save_json:
-        # Save JSON result
-        formatted_json = json.dumps(json_result, indent=2)
-        with open('document_parsed.json', 'w') as f:
-            f.write(formatted_json)
+        # Write one compact page record per line so later stages can stream it
+        write_pages_ndjson(json_result[0]['pages'], json_output_filename)
+
+        print('**************************************************')
+        print(f"JSON data has been written to {json_output_filename}")
+        print('**************************************************')
     
-    # Extract images
-    parser.get_images(json_result,"./images")
+    if not use_local:
+        # Extract images
+        parser.get_images(json_result, image_download_dir)
+
+        #Rename images
+        rename_image_files(json_result[0]['job_id'], image_download_dir)
 
     print('**************************************************')
-    print("Images have been extracted and saved to ./images")
+    print(f"Images have been extracted and saved to {image_download_dir}")
     print('**************************************************')
 
-    #Rename images
-    rename_image_files(json_result[0]['job_id'])
-
     #Match images with dimensions and save metadata
     image_metadata = []
 
@@ -104,27 +110,175 @@ def process_document(file_path, json_output_filename="document_parsed.json", ima
                 "name": name,
                 "width": width,
                 "height": height,
+                "original_height": original_height,
+                "original_width": original_width,
+                "page": page['page']
             })
 
     # Save image metadata to JSON file
     if save_json:
-        with open('image_metadata.json', 'w') as f:
+        with open(image_metadata_filename, 'w') as f:
             json.dump(image_metadata, f, indent=2)
         
     print('**************************************************')
-    print("Image metadata has been saved to image_metadata.json")
+    print(f"Image metadata has been saved to {image_metadata_filename}")
     print('**************************************************')
     
     return json_result
 
-def extract_text_and_tables(document_content):
-    text = []
-    for page in document_content[0]["pages"]:
+def write_pages_ndjson(pages, path):
+    """
+    Write parsed pages as newline-delimited JSON, one page record per line.
+    
+    Args:
+        pages (iterable): Page dictionaries from the LlamaParse result
+        path (str): Output file path
+        
+    Returns:
+        int: Number of pages written
+    """
+    count = 0
+    with open(path, 'w') as f:
+        for page in pages:
+            f.write(json.dumps(page, separators=(',', ':')))
+            f.write('\n')
+            count += 1
+    return count
+
+def iter_pages(path):
+    """
+    Iterate over the pages of a parsed document without loading the whole file.
+    
+    Args:
+        path (str): An NDJSON file written by write_pages_ndjson, or a legacy
+            LlamaParse JSON file (which has to be loaded in full)
+        
+    Yields:
+        dict: One page record at a time
+    """
+    if not path.endswith('.ndjson'):
+        with open(path, 'r') as f:
+            yield from json.load(f)[0]['pages']
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_text_and_tables(pages):
+    """
+    Yield the heading and text values and table rows of each page in order.
+    
+    Args:
+        pages (iterable): Page dictionaries, e.g. from iter_pages
+        
+    Yields:
+        str or list: Text values, or lists of table rows
+    """
+    for page in pages:
         for item in page['items']:
             if item['type'] == 'heading':
-                text.append(item['value'])
+                yield item['value']
             if item['type'] == 'text':
-                text.append(item['value'])
+                yield item['value']
             if item['type'] == 'table':
-                text.append(item['rows'])
-    return text
+                yield item['rows']
+
+def extract_text_and_tables(document_content):
+    if isinstance(document_content, ParsedDocument):
+        return list(document_content.iter_text_and_tables())
+    return list(iter_text_and_tables(document_content[0]["pages"]))
+
+def build_section_tree(document_content):
+    """
+    Build a heading -> section -> pages tree from the parsed document items.
+    
+    Args:
+        document_content (list or ParsedDocument): JSON result from LlamaParse, or its compact form
+        
+    Returns:
+        list: Root sections, each a dict with "heading", "level", "pages", "text"
+            (the section's own text, excluding subsections) and "children"
+    """
+    roots = []
+    untitled = {"heading": "Untitled Section", "level": 0, "pages": [], "text": [], "children": []}
+    stack = []
+    for page in document_pages(document_content):
+        for item in page['items']:
+            if item['type'] == 'heading':
+                level = item.get('lvl', 1)
+                section = {"heading": item['value'], "level": level, "pages": [page['page']], "text": [], "children": []}
+                while stack and stack[-1]["level"] >= level:
+                    stack.pop()
+                (stack[-1]["children"] if stack else roots).append(section)
+                stack.append(section)
+                continue
+
+            if item['type'] == 'text':
+                value = item['value']
+            elif item['type'] == 'table':
+                value = item.get('md') or '\n'.join(' | '.join(str(cell) for cell in row) for row in item['rows'])
+            else:
+                continue
+            section = stack[-1] if stack else untitled
+            if not section["pages"] or section["pages"][-1] != page['page']:
+                section["pages"].append(page['page'])
+            section["text"].append(value)
+
+    if untitled["text"]:
+        roots.insert(0, untitled)
+
+    def finalize(section):
+        section["text"] = "\n\n".join(section["text"])
+        for child in section["children"]:
+            finalize(child)
+    for root in roots:
+        finalize(root)
+    return roots
+
+def get_scope_sections(section_tree):
+    """
+    Pick the sections used as retrieval scopes: the top-level sections,
+    descending past a single wrapping section such as the document title.
+    
+    Args:
+        section_tree (list): Root sections from build_section_tree
+        
+    Returns:
+        list: Dicts with "heading", "path" (headings from the root), "pages" and
+            "text" (the section's heading and text, including all of its subsections)
+    """
+    path = []
+    wrapper_texts = []
+    sections = section_tree
+    while True:
+        headed = [section for section in sections if section["level"] > 0]
+        if len(headed) != 1 or not headed[0]["children"]:
+            break
+        wrapper_texts.extend(section["text"] for section in sections if section["text"])
+        path.append(headed[0]["heading"])
+        sections = headed[0]["children"]
+
+    def collect(section, texts, pages):
+        if section["text"]:
+            texts.append(section["text"])
+        pages.update(section["pages"])
+        for child in section["children"]:
+            texts.append(child["heading"])
+            collect(child, texts, pages)
+
+    scopes = []
+    for section in sections:
+        # Text directly under the wrapping sections belongs to the first scope
+        texts = wrapper_texts if not scopes else []
+        if section["level"] > 0:
+            texts.append(section["heading"])
+        pages = set()
+        collect(section, texts, pages)
+        scopes.append({
+            "heading": section["heading"],
+            "path": path + [section["heading"]],
+            "pages": sorted(pages),
+            "text": "\n\n".join(texts)
+        })
+    return scopes
@@ -0,0 +1,214 @@
+import json
+import math
+import os
+import re
+from array import array
+from collections import defaultdict
+from typing import Dict, List
+from lexical_index import tokenize
+from document_model import document_pages
+
+MONTHS = r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\.?"
+SCALE = r"(?:\s?(?:thousand|million|billion|trillion|[kKmMbB]n?)\b)?"
+
+# Checked in order; earlier patterns win where matches overlap
+FACT_PATTERNS = [
+    ("currency", re.compile(r"(?:[$€£¥]\s?\d[\d,]*(?:\.\d+)?" + SCALE + r")|(?:\d[\d,]*(?:\.\d+)?" + SCALE + r"\s?(?:USD|EUR|GBP|dollars|euros|pounds)\b)")),
+    ("percent", re.compile(r"\d+(?:\.\d+)?\s?(?:%|percent\b)")),
+    ("date", re.compile(r"\b(?:" + MONTHS + r"\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}|\d{1,2}\s+" + MONTHS + r"\s+\d{4}|" + MONTHS + r"\s+\d{4}|\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/\d{2,4})\b")),
+    ("year", re.compile(r"\b(?:1[89]\d{2}|20\d{2})s?\b")),
+    ("number", re.compile(r"\b\d[\d,]*(?:\.\d+)?" + SCALE)),
+]
+
+# Words in a query that signal which kind of fact is wanted; a query without any is not a data-point query.
+# Words that also occur in qualitative questions (e.g. "growth strategies") are left out.
+KIND_HINTS = {
+    "currency": {"cost", "costs", "price", "revenue", "revenues", "funding", "raised", "valuation", "paid", "worth", "much", "dollars", "sales", "income", "profit"},
+    "percent": {"percent", "percentage", "rate", "margin"},
+    "date": {"when", "date", "day", "month"},
+    "year": {"when", "year", "founded", "launched"},
+    "number": {"many", "number", "count", "total", "size"},
+}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "was", "were", "are", "be",
+    "what", "which", "who", "how", "did", "does", "do", "by", "with", "from", "at", "as", "that",
+    "this", "it", "its", "their", "about", "any", "exact", "quote", "data", "source", "document",
+    "specific", "figure", "figures",
+}
+
+SCALE_FACTORS = {"thousand": 1e3, "k": 1e3, "million": 1e6, "m": 1e6, "mn": 1e6,
+                 "billion": 1e9, "b": 1e9, "bn": 1e9, "trillion": 1e12}
+
+def parse_numeric(raw: str) -> float:
+    """Best-effort numeric value of a fact, scaling words like "million"; NaN for dates."""
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", raw)
+    if not match:
+        return math.nan
+    value = float(match.group().replace(",", ""))
+    scale = re.search(r"(thousand|million|billion|trillion|bn|mn|[kmb])\b", raw[match.end():].lower())
+    if scale:
+        value *= SCALE_FACTORS[scale.group(1)]
+    return value
+
+def extract_facts(text: str, context_chars: int = 120) -> List[Dict]:
+    """
+    Extract currency amounts, percentages, dates, years and plain numbers from text.
+
+    Args:
+        text (str): Text to scan
+        context_chars (int): Characters of surrounding text to keep on each side
+
+    Returns:
+        List[Dict]: Facts with "kind", "raw", "start", "end" and "context" keys
+    """
+    taken = []
+    facts = []
+    for kind, pattern in FACT_PATTERNS:
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if any(start < other_end and other_start < end for other_start, other_end in taken):
+                continue
+            taken.append((start, end))
+            facts.append({
+                "kind": kind,
+                "raw": match.group().strip(),
+                "start": start,
+                "end": end,
+                "context": text[max(0, start - context_chars):end + context_chars].strip()
+            })
+    facts.sort(key=lambda fact: fact["start"])
+    return facts
+
+class FactIndex:
+    """
+    Columnar index of data points found in a parsed document.
+    Each fact is one row across parallel columns; lookups go through
+    value and context-term dictionaries instead of a vector search.
+    """
+
+    COLUMNS = ("kinds", "raws", "sources", "pages", "contexts")
+
+    def __init__(self):
+        self.kinds = []
+        self.raws = []
+        self.values = array('d')  # numeric value, NaN when not numeric
+        self.sources = []
+        self.pages = array('i')
+        self.contexts = []
+        self._by_value = defaultdict(list)  # normalized raw value -> fact rows
+        self._by_term = defaultdict(set)  # context term -> fact rows
+        self._keys = set()  # (source, page, context, raw) of every fact, so re-ingestion skips them
+
+    def __len__(self):
+        return len(self.raws)
+
+    def _add(self, kind: str, raw: str, source: str, page: int, context: str) -> None:
+        # Re-ingesting a document must not duplicate its facts
+        key = (source, page, context, raw)
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        tokens = tokenize(raw)
+        row = len(self.raws)
+        self.kinds.append(kind)
+        self.raws.append(raw)
+        self.values.append(parse_numeric(raw) if kind != "date" else math.nan)
+        self.sources.append(source)
+        self.pages.append(page)
+        self.contexts.append(context)
+        for token in tokens:
+            self._by_value[token].append(row)
+        for term in set(tokenize(context)) - STOPWORDS:
+            self._by_term[term].add(row)
+
+    def add_document(self, document_content, source: str) -> None:
+        """
+        Extract facts from the text items and table cells of a LlamaParse result.
+
+        Args:
+            document_content (list or ParsedDocument): JSON result from LlamaParse, or its compact form
+            source (str): Path of the source document
+        """
+        for page in document_pages(document_content):
+            for item in page['items']:
+                if item['type'] in ('text', 'heading'):
+                    for fact in extract_facts(item['value']):
+                        self._add(fact["kind"], fact["raw"], source, page['page'], fact["context"])
+                elif item['type'] == 'table' and item.get('rows'):
+                    header = [str(cell) for cell in item['rows'][0]]
+                    for row in item['rows'][1:]:
+                        label = str(row[0]) if row else ""
+                        for col, cell in enumerate(row):
+                            cell = str(cell).strip()
+                            if col == 0 or not re.search(r"\d", cell):
+                                continue
+                            column = header[col] if col < len(header) else ""
+                            cell_facts = extract_facts(cell)
+                            kind = cell_facts[0]["kind"] if cell_facts else "table_cell"
+                            self._add(kind, cell, source, page['page'], f"{label} | {column}: {cell}")
+
+    def lookup(self, query: str, limit: int = 3, min_score: float = 2.0) -> List[Dict]:
+        """
+        Answer a data-point query from the index.
+        Only queries that ask for a kind of data point (an amount, percentage,
+        date, year or count) are answered, and only with facts of that kind.
+        Facts score one point per query term in their context and two more
+        when their value appears in the query.
+
+        Args:
+            query (str): The data-point query
+            limit (int): Maximum number of facts to return
+            min_score (float): Minimum score for a fact to be returned
+
+        Returns:
+            List[Dict]: Facts with kind, value, numeric value, source, page, context and score, best first;
+                empty if the query does not ask for a data point
+        """
+        terms = set(tokenize(query)) - STOPWORDS
+        wanted_kinds = {kind for kind, hints in KIND_HINTS.items() if terms & hints}
+        if "%" in query:
+            wanted_kinds.add("percent")
+        if any(symbol in query for symbol in "$€£¥"):
+            wanted_kinds.add("currency")
+        if not wanted_kinds:
+            return []
+
+        scores = defaultdict(float)
+        for term in terms:
+            for row in self._by_term.get(term, ()):
+                scores[row] += 1.0
+            for row in self._by_value.get(term, ()):
+                scores[row] += 2.0
+        ranked = sorted(
+            (item for item in scores.items() if item[1] >= min_score and self.kinds[item[0]] in wanted_kinds),
+            key=lambda item: item[1],
+            reverse=True
+        )[:limit]
+        return [
+            {
+                "kind": self.kinds[row],
+                "value": self.raws[row],
+                "numeric_value": None if math.isnan(self.values[row]) else self.values[row],
+                "source": self.sources[row],
+                "page": self.pages[row],
+                "context": self.contexts[row],
+                "score": score
+            } for row, score in ranked
+        ]
+
+    def save(self, path: str) -> None:
+        """Write the index columns to a JSON file; lookup dictionaries are rebuilt on load."""
+        with open(path, 'w') as f:
+            json.dump({column: list(getattr(self, column)) for column in self.COLUMNS}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "FactIndex":
+        """Load an index saved with save(), or return an empty index if the file does not exist."""
+        index = cls()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            for row in zip(*(data[column] for column in cls.COLUMNS)):
+                index._add(*row)
+        return index
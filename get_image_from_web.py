@@ -14,6 +14,7 @@ from io import BytesIO
 from tools import get_best_image
 from multimodal_rag import build_image_index
 import copy
+import hashlib
 import json
 load_dotenv()
 
@@ -29,7 +30,8 @@ def search_and_download_image_from_web(
     query: str,
     output_dir: str = "images",
     filename: Optional[str] = None,
-    index: int = 0
+    index: int = 0,
+    catalog=None
 ) -> Optional[str]:
     """
     Search Tavily for an image and download the first result.
@@ -39,6 +41,7 @@ def search_and_download_image_from_web(
         output_dir (str): Directory to save the downloaded image.
         filename (str, optional): Filename for the image (defaults to slugified query).
         index (int): Which image result to download (0 = top result).
+        catalog (ImageCatalog, optional): Image catalog to record the download in.
 
     Returns:
         str: Path to the saved image, or None if no image found.
@@ -65,6 +68,24 @@ def search_and_download_image_from_web(
         with open(image_path2, "wb") as f:
             f.write(img_data)
 
+        if catalog is not None:
+            # Read the size from the bytes already in memory so later stages never re-open the file
+            try:
+                with Image.open(BytesIO(img_data)) as img:
+                    width, height = img.size
+                    image_format = (img.format or "").lower() or None
+            except Exception:
+                width, height, image_format = None, None, None
+            catalog.add_image(
+                image_path2,
+                width=width,
+                height=height,
+                image_format=image_format,
+                source_type="web",
+                source=image_url,
+                content_hash=hashlib.sha256(img_data).hexdigest()
+            )
+
         print(f"✅ Image saved at: {image_path2}")
         return image_path
 
@@ -72,7 +93,7 @@ def search_and_download_image_from_web(
         print(f"❌ Failed to download image: {e}")
         return None
 
-def update_slide_content(slide_content):    
+def update_slide_content(slide_content, catalog=None):    
 
     image_index = build_image_index("./images")
     used_images = set()
@@ -91,7 +112,7 @@ def update_slide_content(slide_content):
 
             # if confidence is less than 0.30, get from web
             if confidence < 0.30:
-                image_path = search_and_download_image_from_web(caption)
+                image_path = search_and_download_image_from_web(caption, catalog=catalog)
                 
             if image_path:
                 used_images.add(image_path)
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+from typing import Optional
+
+IMAGE_CATALOG_PATH = "./image_catalog.db"
+
+def lookup_key(name: str) -> str:
+    """Normalize an image name the way slide content tends to misspell it (case, spaces vs underscores)."""
+    return os.path.basename(name).strip().lower().replace(" ", "_")
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ImageCatalog:
+    """
+    SQLite catalog of every image the pipeline extracts or downloads.
+
+    Each row is recorded once, when the image is written, with its canonical
+    path, content hash, pixel dimensions, format and source (document page or
+    web URL). Later stages look images up here instead of probing the
+    filesystem or re-opening files with PIL.
+    """
+
+    def __init__(self, db_path: str = IMAGE_CATALOG_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                name TEXT PRIMARY KEY,
+                lookup_key TEXT NOT NULL,
+                path TEXT NOT NULL,
+                content_hash TEXT,
+                width INTEGER,
+                height INTEGER,
+                format TEXT,
+                source_type TEXT,
+                source TEXT,
+                page INTEGER
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS images_lookup_key ON images (lookup_key)")
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def add_image(self, path: str, width: Optional[int] = None, height: Optional[int] = None, image_format: Optional[str] = None,
+                  source_type: str = "document", source: Optional[str] = None, page: Optional[int] = None,
+                  content_hash: Optional[str] = None) -> dict:
+        """
+        Record an image that has just been written to disk.
+
+        Args:
+            path (str): Canonical path of the image file
+            width (int, optional): Pixel width, if already known from the parser or download
+            height (int, optional): Pixel height, if already known from the parser or download
+            image_format (str, optional): Image format (defaults to the file extension)
+            source_type (str): "document" or "web"
+            source (str, optional): Source document path or web URL
+            page (int, optional): Document page the image was extracted from
+            content_hash (str, optional): SHA-256 of the file, computed if not given
+
+        Returns:
+            dict: The catalog entry
+        """
+        name = os.path.basename(path)
+        if image_format is None:
+            image_format = os.path.splitext(name)[1].lstrip('.').lower() or None
+        entry = {
+            "name": name,
+            "lookup_key": lookup_key(name),
+            "path": path,
+            "content_hash": content_hash or file_hash(path),
+            "width": int(width) if width else None,
+            "height": int(height) if height else None,
+            "format": image_format,
+            "source_type": source_type,
+            "source": source,
+            "page": page
+        }
+        self.conn.execute(
+            "INSERT OR REPLACE INTO images VALUES (:name, :lookup_key, :path, :content_hash, :width, :height, :format, :source_type, :source, :page)",
+            entry
+        )
+        self.conn.commit()
+        return entry
+
+    def get(self, name: str) -> Optional[dict]:
+        """
+        Look up an image by file name, falling back to a case- and underscore-insensitive match.
+
+        Args:
+            name (str): Image file name or path as it appears in slide content
+
+        Returns:
+            dict: The catalog entry, or None if the image is not catalogued
+        """
+        row = self.conn.execute("SELECT * FROM images WHERE name = ?", (os.path.basename(name),)).fetchone()
+        if row is None:
+            row = self.conn.execute("SELECT * FROM images WHERE lookup_key = ?", (lookup_key(name),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def resolve_path(self, name: str) -> Optional[str]:
+        """Canonical path of a catalogued image, or None."""
+        entry = self.get(name)
+        return entry["path"] if entry else None
+
+    def dimensions(self, name: str):
+        """Pixel (width, height) of a catalogued image, or (None, None)."""
+        entry = self.get(name)
+        return (entry["width"], entry["height"]) if entry else (None, None)
+
+    def clear(self) -> None:
+        """Forget every image, e.g. when the images folder is cleared."""
+        self.conn.execute("DELETE FROM images")
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+BUILD_STATE_PATH = "build_state.json"
+
+def content_hash(*parts) -> str:
+    """Stable SHA-256 of JSON-serializable parts (dict keys sorted), used as a dependency key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class BuildState:
+    """
+    Results of each pipeline stage from the previous run, keyed by the content
+    hash of their inputs: chunk -> summary, summaries -> outline and section
+    slides, slide -> layout mapping. A stage reuses a stored result when its
+    inputs hash the same and recomputes it otherwise, so after a document edit
+    only the work downstream of the changed chunks is redone.
+
+    Only entries used in the current run are saved, so the state always
+    describes the latest deck and removed chunks do not accumulate.
+    """
+
+    def __init__(self, path: str = BUILD_STATE_PATH):
+        self.path = path
+        self.previous: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.previous = json.load(f)
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable build state {path}: {e}")
+        self.current: Dict[str, Dict[str, Any]] = {}
+        self.reused: Dict[str, List[str]] = {}
+        self.recomputed: Dict[str, List[str]] = {}
+
+    def get(self, stage: str, key: str, label: Optional[str] = None) -> Optional[Any]:
+        """
+        Look up the stored result of a stage for inputs hashing to key.
+
+        Args:
+            stage (str): Pipeline stage, e.g. "summaries"
+            key (str): content_hash of the stage inputs
+            label (str, optional): Human-readable name of the item for the change report
+
+        Returns:
+            The stored result (kept for the next run), or None if it must be recomputed
+        """
+        entries = self.previous.get(stage, {})
+        if key in entries:
+            self.current.setdefault(stage, {})[key] = entries[key]
+            self.reused.setdefault(stage, []).append(label or key[:12])
+            return entries[key]
+        self.recomputed.setdefault(stage, []).append(label or key[:12])
+        return None
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        """Store the result of a stage for inputs hashing to key."""
+        self.current.setdefault(stage, {})[key] = value
+
+    def get_latest(self, stage: str) -> Optional[Any]:
+        """The previous run's single result for a stage that is not keyed by content (e.g. the outline)."""
+        return self.previous.get(stage, {}).get("latest")
+
+    def put_latest(self, stage: str, value: Any) -> None:
+        self.current.setdefault(stage, {})["latest"] = value
+
+    def save(self) -> None:
+        with open(self.path, 'w') as f:
+            json.dump(self.current, f)
+
+    def change_report(self) -> Dict:
+        """
+        What was reused and what was recomputed in this run, per stage.
+
+        Returns:
+            Dict: stage -> {"reused", "recomputed", "removed" counts and "recomputed_items" labels}
+        """
+        report = {}
+        for stage in sorted(set(self.reused) | set(self.recomputed) | set(self.previous)):
+            previous_keys = set(self.previous.get(stage, {})) - {"latest"}
+            current_keys = set(self.current.get(stage, {})) - {"latest"}
+            report[stage] = {
+                "reused": len(self.reused.get(stage, [])),
+                "recomputed": len(self.recomputed.get(stage, [])),
+                "removed": len(previous_keys - current_keys),
+                "recomputed_items": self.recomputed.get(stage, [])
+            }
+        return report
+
+    def write_change_report(self, path: str = "change_report.json") -> Dict:
+        """Print a one-line summary per stage and save the full change report."""
+        report = self.change_report()
+        for stage, counts in report.items():
+            print(f"{stage}: reused {counts['reused']}, recomputed {counts['recomputed']}, removed {counts['removed']}")
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Change report saved to {path}")
+        return report
+
+def summary_key(chunk: str, previous_chunk: Optional[str], models: List[str], context_mode: str) -> str:
+    """
+    Build state key of a chunk summary. Only source text is hashed, never generated
+    summaries, so one edit does not cascade down the chain of chunks: "full" context
+    puts the previous chunk in the prompt, so its text is part of the key, while the
+    rolling "summary" and "entities" contexts are left out and an edited chunk only
+    re-summarizes itself.
+    """
+    return content_hash(chunk, previous_chunk if context_mode == "full" else None, models, context_mode)
+
+def summarize_chunks(summarizer, chunks: List[str], build_state: Optional[BuildState] = None,
+                     load: Optional[Callable[[Dict], Any]] = None) -> List[Any]:
+    """
+    Summarize chunks in order, reusing the summaries stored in the build state.
+
+    Args:
+        summarizer (PresentationSummarizer): Summarizer carrying the rolling context
+        chunks (List[str]): Text chunks in document order
+        build_state (BuildState, optional): Stored summaries from the previous run
+        load (callable, optional): Rebuilds a summary from its stored dict (e.g. PresentationIdeation)
+
+    Returns:
+        list: One summary per chunk
+    """
+    summaries = []
+    for i, chunk in enumerate(chunks):
+        previous_chunk = chunks[i-1] if i > 0 else None
+        key = summary_key(chunk, previous_chunk, summarizer.models(), summarizer.context.mode)
+        cached = build_state.get("summaries", key, label=f"chunk {i+1}") if build_state is not None else None
+        if cached is not None:
+            summary = load(cached) if load is not None else cached
+            # Keep the rolling context as if the chunk had been summarized again
+            summarizer.context.update(chunk, summary.detailed_summary)
+            print(f"Chunk {i+1}/{len(chunks)} unchanged, reusing its summary.")
+        else:
+            summary = summarizer.summarize_text(chunk, previous_chunk)
+            if build_state is not None:
+                build_state.put("summaries", key, summary.model_dump())
+            print(f"Chunk {i+1}/{len(chunks)} summarized.")
+        summaries.append(summary)
+    return summaries
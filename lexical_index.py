@@ -0,0 +1,150 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\d+(?:[.,]\d+)*%?|\w+")
+QUOTED_PATTERN = re.compile(r"[\"“”]([^\"“”]{3,})[\"“”]")
+NUMBER_PATTERN = re.compile(r"\d")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word and number tokens.
+    Thousands separators are removed so "1,000" and "1000" match.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        List[str]: List of tokens
+    """
+    return [token.replace(",", "") for token in TOKEN_PATTERN.findall(text.lower())]
+
+def quoted_phrases(query: str) -> List[str]:
+    """Return the quoted phrases in a query, lowercased."""
+    return [phrase.lower().strip() for phrase in QUOTED_PATTERN.findall(query)]
+
+def is_literal_query(query: str) -> bool:
+    """Whether a query asks for a quoted string or a number, which lexical search answers best."""
+    return bool(quoted_phrases(query)) or bool(NUMBER_PATTERN.search(query))
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked lists of ids with reciprocal rank fusion.
+
+    Args:
+        rankings (List[List[str]]): Ranked id lists, best first
+        k (int): RRF damping constant
+
+    Returns:
+        List[Tuple[str, float]]: (id, fused score) pairs, best first
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class BM25Index:
+    """In-process BM25 inverted index over document chunks."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = []  # {"content", "source", "chunk_id"} per indexed chunk
+        self.postings = defaultdict(list)  # term -> [(doc index, term frequency), ...]
+        self.doc_lengths = []
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add_documents(self, documents: List[Dict]) -> None:
+        """
+        Add chunks to the index.
+
+        Args:
+            documents (List[Dict]): Dictionaries with "content", "source" and "chunk_id" keys
+        """
+        for document in documents:
+            doc_index = len(self.documents)
+            tokens = tokenize(document["content"])
+            for term, frequency in Counter(tokens).items():
+                self.postings[term].append((doc_index, frequency))
+            self.documents.append(document)
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+
+    def remove_documents(self, chunk_ids: Iterable[str]) -> None:
+        """Remove chunks by chunk_id; the postings are rebuilt from the remaining chunks."""
+        removed = set(chunk_ids)
+        remaining = [document for document in self.documents if document["chunk_id"] not in removed]
+        if len(remaining) == len(self.documents):
+            return
+        self.documents = []
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        self.total_length = 0
+        self.add_documents(remaining)
+
+    def search(self, query: str, k: int = 3, filter: Optional[Dict] = None) -> List[Tuple[Dict, float]]:
+        """
+        Rank indexed chunks against a query with BM25.
+        Chunks containing every quoted phrase in the query are ranked first.
+
+        Args:
+            query (str): The search query
+            k (int): Number of chunks to return
+            filter (Dict, optional): Only return chunks whose fields equal these values
+
+        Returns:
+            List[Tuple[Dict, float]]: (document, score) pairs, best first
+        """
+        if not self.documents:
+            return []
+
+        num_docs = len(self.documents)
+        avg_length = self.total_length / num_docs
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_index, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_index] / avg_length)
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        phrases = quoted_phrases(query)
+        if phrases:
+            for doc_index in scores:
+                content = self.documents[doc_index]["content"].lower()
+                if all(phrase in content for phrase in phrases):
+                    scores[doc_index] += 1e6
+
+        if filter:
+            scores = {
+                doc_index: score for doc_index, score in scores.items()
+                if all(self.documents[doc_index].get(key) == value for key, value in filter.items())
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.documents[doc_index], score) for doc_index, score in ranked]
+
+    def save(self, path: str) -> None:
+        """Write the indexed chunks to a JSON file; postings are rebuilt on load."""
+        with open(path, 'w') as f:
+            json.dump({"k1": self.k1, "b": self.b, "documents": self.documents}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load an index saved with save(), or return an empty index if the file does not exist."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.add_documents(data["documents"])
+        return index
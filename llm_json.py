@@ -0,0 +1,442 @@
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+def extract_json_text(content: str) -> str:
+    """
+    Strip markdown code fences and any prose before the first JSON bracket.
+
+    Args:
+        content (str): Raw model response
+
+    Returns:
+        str: Text starting at the first '{' or '['
+    """
+    content = content.strip()
+    match = FENCE_PATTERN.search(content)
+    if match:
+        content = match.group(1).strip()
+    starts = [index for index in (content.find('{'), content.find('[')) if index >= 0]
+    return content[min(starts):] if starts else content
+
+def repair_json(text: str) -> str:
+    """
+    Repair the defects LLM JSON commonly has: trailing commas, Python literals
+    (True/False/None), prose after the closing bracket, and truncation. A
+    truncated response is cut back to its last complete value and the open
+    strings, arrays and objects are closed, so every complete item is kept.
+
+    Args:
+        text (str): JSON text, e.g. from extract_json_text
+
+    Returns:
+        str: Repaired JSON text (not guaranteed to parse if the input is not JSON-like at all)
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    safe: Optional[Tuple[int, Tuple[str, ...]]] = None  # output length and open brackets after the last complete value
+    list_safe: Dict[int, Tuple[int, Tuple[str, ...]]] = {}  # same, after the last complete item of the open list at each depth
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+            out.append(char)
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            list_safe.pop(len(stack), None)
+            out.append(char)
+        elif char in '}]':
+            _strip_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break  # ignore anything after the top-level value
+            safe = (len(out), tuple(stack))
+            if stack[-1] == ']':
+                list_safe[len(stack)] = safe
+        elif char == ',':
+            safe = (len(out), tuple(stack))
+            if stack and stack[-1] == ']':
+                list_safe[len(stack)] = safe
+            out.append(char)
+        else:
+            literal = next((name for name in PYTHON_LITERALS if text.startswith(name, i)), None)
+            if literal is not None and not (out and (out[-1].isalnum() or out[-1] == '_')):
+                out.append(PYTHON_LITERALS[literal])
+                i += len(literal)
+                continue
+            out.append(char)
+        i += 1
+
+    if stack or in_string:
+        # Truncated: drop the incomplete trailing value and close what is still open. If a list
+        # is still open, cut back to its last complete item so a partial item is not kept
+        open_list = next((depth for depth in range(1, len(stack) + 1) if stack[depth - 1] == ']' and depth in list_safe), None)
+        if open_list is not None:
+            del out[list_safe[open_list][0]:]
+            stack = list(list_safe[open_list][1])
+        elif safe is not None:
+            del out[safe[0]:]
+            stack = list(safe[1])
+        elif in_string:
+            out.append('"')
+        _strip_trailing_comma(out)
+        out.extend(reversed(stack))
+    return "".join(out)
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+def parse_json_response(content: str) -> Any:
+    """
+    Parse a model response as JSON, repairing it if plain parsing fails.
+
+    Args:
+        content (str): Raw model response
+
+    Returns:
+        Any: The parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: If the response cannot be repaired into valid JSON
+    """
+    text = extract_json_text(content)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(repair_json(text))
+
+def parse_model_response(content: str, response_model: Type[ModelT]) -> ModelT:
+    """
+    Validate a model response against a Pydantic model, repairing the JSON if needed.
+
+    Args:
+        content (str): Raw model response
+        response_model (Type[BaseModel]): Model to validate with
+
+    Returns:
+        BaseModel: The validated model
+
+    Raises:
+        ValidationError: If the repaired response still does not validate
+    """
+    text = extract_json_text(content)
+    try:
+        return response_model.model_validate_json(text)
+    except ValidationError:
+        return response_model.model_validate_json(repair_json(text))
+
+def chat_json(client, messages: List[Dict], model: str = "gpt-3.5-turbo", temperature: float = 0.7,
+              max_tokens: int = 2000, json_mode: bool = True, usage: Optional[List[Dict]] = None) -> Tuple[str, bool]:
+    """
+    Request a chat completion, in JSON mode when the model supports it. If a
+    usage list is given, the call's token counts are appended to it.
+
+    Returns:
+        tuple: (response content, whether the response was cut off at max_tokens)
+    """
+    response = _create_completion(client, json_mode, model=model, messages=messages, temperature=temperature, max_tokens=max_tokens)
+    if usage is not None:
+        usage.append({
+            "prompt_tokens": response.usage.prompt_tokens if response.usage else None,
+            "completion_tokens": response.usage.completion_tokens if response.usage else None
+        })
+    choice = response.choices[0]
+    return (choice.message.content or "").strip(), choice.finish_reason == "length"
+
+def _create_completion(client, json_mode: bool, **kwargs):
+    """Create a chat completion, dropping request options the model or API version rejects."""
+    if json_mode:
+        kwargs["response_format"] = {"type": "json_object"}
+    while True:
+        try:
+            return client.chat.completions.create(**kwargs)
+        except Exception as e:
+            # Older models reject response_format and older APIs stream_options; repair handles free-form output
+            rejected = next((option for option in ("response_format", "stream_options") if option in kwargs and option in str(e)), None)
+            if rejected is None:
+                raise
+            del kwargs[rejected]
+
+def request_model(client, messages: List[Dict], response_model: Type[ModelT], model: str = "gpt-3.5-turbo",
+                  temperature: float = 0.7, max_tokens: int = 2000, max_rerequests: int = 1,
+                  json_mode: bool = True, usage: Optional[List[Dict]] = None) -> ModelT:
+    """
+    Request a structured response and validate it with a Pydantic model without
+    throwing away partially good output. The response is repaired if needed;
+    then, instead of redoing the whole call, a follow-up request asks only for
+    the fields and list items that are missing or invalid (and for the rest of
+    a list if the response was truncated). Items still invalid after that are
+    dropped from their list.
+
+    Args:
+        client (OpenAI): OpenAI client
+        messages (List[Dict]): Chat messages of the original request
+        response_model (Type[BaseModel]): Model the response must validate against
+        model (str): Chat model
+        temperature (float): Sampling temperature
+        max_tokens (int): Completion token limit
+        max_rerequests (int): Number of follow-up requests for missing or invalid parts
+        json_mode (bool): Whether to ask the API for JSON output
+        usage (List[Dict], optional): Receives the token counts of every call made
+
+    Returns:
+        BaseModel: The validated response
+
+    Raises:
+        ValidationError: If required fields are still missing or invalid after the follow-ups
+    """
+    content, truncated = chat_json(client, messages, model, temperature, max_tokens, json_mode, usage)
+    return resolve_model_response(client, messages, response_model, content, truncated, model, temperature,
+                                  max_tokens, max_rerequests, json_mode, usage)
+
+def resolve_model_response(client, messages: List[Dict], response_model: Type[ModelT], content: str, truncated: bool,
+                           model: str = "gpt-3.5-turbo", temperature: float = 0.7, max_tokens: int = 2000,
+                           max_rerequests: int = 1, json_mode: bool = True, usage: Optional[List[Dict]] = None) -> ModelT:
+    """
+    The validation half of request_model, for a response that was already received
+    (e.g. streamed with StreamingListParser): validate, repair, and re-request only
+    the missing or invalid parts.
+    """
+    text = extract_json_text(content)
+    if not truncated:
+        try:
+            return response_model.model_validate_json(text)
+        except ValidationError:
+            pass
+    try:
+        data = json.loads(repair_json(text))
+    except json.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    for attempt in range(max_rerequests + 1):
+        problems = find_problems(data, response_model)
+        continue_field = _last_list_field(data, response_model) if truncated else None
+        if not problems and continue_field is None:
+            return response_model.model_validate(data)
+        if attempt == max_rerequests:
+            break
+        print(f"Re-requesting {len(problems)} invalid part(s){' and the truncated rest of ' + continue_field if continue_field else ''} "
+              f"of a {response_model.__name__} response")
+        follow_up = messages + [
+            {"role": "assistant", "content": json.dumps(data)},
+            {"role": "user", "content": _fix_prompt(problems, continue_field, data)}
+        ]
+        fix_content, truncated = chat_json(client, follow_up, model, temperature, max_tokens, json_mode, usage)
+        try:
+            fixes = parse_json_response(fix_content)
+        except json.JSONDecodeError:
+            continue
+        data = _apply_fixes(data, fixes if isinstance(fixes, dict) else {}, continue_field)
+
+    return response_model.model_validate(_drop_invalid_items(data, find_problems(data, response_model)))
+
+def find_problems(data: Dict, response_model: Type[BaseModel]) -> List[Tuple[str, Optional[int], str]]:
+    """
+    Locate validation errors as (top-level field, list index or None, message).
+    """
+    try:
+        response_model.model_validate(data)
+        return []
+    except ValidationError as e:
+        problems = {}
+        for error in e.errors():
+            loc = error["loc"]
+            field = str(loc[0]) if loc else ""
+            index = loc[1] if len(loc) > 1 and isinstance(loc[1], int) and isinstance(data.get(field), list) else None
+            problems.setdefault((field, index), error["msg"])
+        return [(field, index, message) for (field, index), message in problems.items()]
+
+def _last_list_field(data: Dict, response_model: Type[BaseModel]) -> Optional[str]:
+    """The list field a truncated response was most likely writing: the last one present."""
+    list_fields = [name for name, value in data.items() if isinstance(value, list) and name in response_model.model_fields]
+    return list_fields[-1] if list_fields else None
+
+def _fix_prompt(problems, continue_field, data) -> str:
+    lines = ["Parts of your JSON response were missing or invalid:"]
+    for field, index, message in problems:
+        lines.append(f"- {field}[{index}]: {message}" if index is not None else f"- {field}: {message}")
+    if continue_field:
+        lines.append(f"- {continue_field}: the response was cut off after {len(data.get(continue_field, []))} items")
+    lines.append(
+        'Do not repeat the valid parts. Return a JSON object with a "fixes" list, where each fix is '
+        '{"field": <field name>, "index": <list index, or null for a whole field>, "value": <corrected value>}'
+        + (f', and a "continuation" list with the remaining items of "{continue_field}".' if continue_field else '.')
+    )
+    return "\n".join(lines)
+
+def _apply_fixes(data: Dict, fixes: Dict, continue_field: Optional[str]) -> Dict:
+    data = dict(data)
+    for fix in fixes.get("fixes", []):
+        if not isinstance(fix, dict) or "field" not in fix or "value" not in fix:
+            continue
+        field, index = fix["field"], fix.get("index")
+        if index is None:
+            data[field] = fix["value"]
+            continue
+        if not isinstance(data.get(field), list):
+            continue
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            continue  # unusable fix; the item stays invalid and is re-requested or dropped
+        data[field] = list(data[field])
+        if 0 <= index < len(data[field]):
+            data[field][index] = fix["value"]
+        elif index == len(data[field]):
+            data[field].append(fix["value"])
+    if continue_field and isinstance(fixes.get("continuation"), list):
+        data[continue_field] = list(data.get(continue_field, [])) + fixes["continuation"]
+    return data
+
+def _drop_invalid_items(data: Dict, problems) -> Dict:
+    data = dict(data)
+    invalid = {}
+    for field, index, _ in problems:
+        if index is not None:
+            invalid.setdefault(field, set()).add(index)
+    for field, indices in invalid.items():
+        print(f"Dropping {len(indices)} invalid item(s) from {field}")
+        data[field] = [item for i, item in enumerate(data[field]) if i not in indices]
+    return data
+
+class StreamingListParser:
+    """
+    Incremental parser for a streamed JSON object that yields the items of one
+    of its top-level list fields (e.g. "slides") as soon as each item closes,
+    instead of after the whole response has arrived. Text outside the object
+    (code fences, prose) is ignored, and every character is scanned once.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.text = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+        self.key = None
+        self.list_depth = None  # depth inside the field's list, once it has opened
+        self.item_start = None
+
+    def feed(self, delta: str) -> List[Any]:
+        """
+        Add streamed text.
+
+        Args:
+            delta (str): The next piece of the response
+
+        Returns:
+            List[Any]: Items of the list field completed by this piece (items that are not valid JSON are skipped)
+        """
+        self.text += delta
+        items = []
+        text = self.text
+        for i in range(self.position, len(text)):
+            char = text[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_string = text[self.string_start + 1:i]
+                continue
+            if char == '"':
+                self.in_string = True
+                self.string_start = i
+            elif char == ':' and self.depth == 1:
+                self.key = self.last_string
+            elif char in '{[':
+                if self.depth == 1 and char == '[' and self.key == self.field and self.list_depth is None:
+                    self.list_depth = 2
+                elif self.depth == self.list_depth and self.item_start is None:
+                    self.item_start = i
+                self.depth += 1
+            elif char in '}]' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == self.list_depth and self.item_start is not None:
+                    try:
+                        items.append(json.loads(text[self.item_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self.item_start = None
+                elif self.list_depth is not None and self.depth < self.list_depth:
+                    self.list_depth = -1  # the list has closed; later lists with the same key are ignored
+        self.position = len(text)
+        return items
+
+class JSONListStream:
+    """
+    Stream a chat completion and iterate over the items of one list field as
+    they arrive. After iteration, content holds the full response text (for
+    resolve_model_response), truncated whether it hit max_tokens, and
+    time_to_first_item / elapsed the timings in seconds.
+    """
+
+    def __init__(self, client, messages: List[Dict], field: str, model: str = "gpt-3.5-turbo",
+                 temperature: float = 0.7, max_tokens: int = 2000, json_mode: bool = True,
+                 usage: Optional[List[Dict]] = None):
+        self.client = client
+        self.messages = messages
+        self.field = field
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.json_mode = json_mode
+        self.usage = usage
+        self.content = ""
+        self.truncated = False
+        self.time_to_first_item = None
+        self.elapsed = None
+
+    def __iter__(self):
+        start = time.perf_counter()
+        parser = StreamingListParser(self.field)
+        stream = _create_completion(self.client, self.json_mode, model=self.model, messages=self.messages,
+                                    temperature=self.temperature, max_tokens=self.max_tokens, stream=True,
+                                    stream_options={"include_usage": True})
+        for chunk in stream:
+            if getattr(chunk, "usage", None) and self.usage is not None:
+                self.usage.append({"prompt_tokens": chunk.usage.prompt_tokens, "completion_tokens": chunk.usage.completion_tokens})
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                self.truncated = choice.finish_reason == "length"
+            if choice.delta.content:
+                for item in parser.feed(choice.delta.content):
+                    if self.time_to_first_item is None:
+                        self.time_to_first_item = time.perf_counter() - start
+                    yield item
+        self.content = parser.text.strip()
+        self.elapsed = time.perf_counter() - start
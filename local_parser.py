@@ -0,0 +1,249 @@
+import hashlib
+import importlib.util
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+# Pages with less extractable text than this are treated as scanned
+MIN_PAGE_CHARS = 20
+
+def local_job_id(file_path):
+    """Stable job id for a local parse, derived from the file content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return f"local-{digest.hexdigest()[:16]}"
+
+def is_scanned_pdf(file_path, sample_pages=10):
+    """
+    Check whether a PDF looks scanned, i.e. most sampled pages have no text layer.
+
+    Args:
+        file_path (str): Path to the PDF
+        sample_pages (int): Number of pages to check from the start
+
+    Returns:
+        bool: True if most sampled pages have no extractable text
+    """
+    import pymupdf
+
+    with pymupdf.open(file_path) as doc:
+        pages = range(min(sample_pages, doc.page_count))
+        empty = sum(len(doc[i].get_text("text").strip()) < MIN_PAGE_CHARS for i in pages)
+        return len(pages) > 0 and empty > len(pages) / 2
+
+def _heading_level(size, body_size):
+    if size >= body_size * 1.6:
+        return 1
+    if size >= body_size * 1.3:
+        return 2
+    return 3
+
+def _inside(bbox, regions):
+    x0, y0, x1, y1 = bbox
+    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+    return any(rx0 <= cx <= rx1 and ry0 <= cy <= ry1 for rx0, ry0, rx1, ry1 in regions)
+
+def parse_pdf_page(task):
+    """
+    Parse one PDF page into a LlamaParse-style page record. Runs in a worker process.
+
+    Args:
+        task (tuple): (file_path, page_index, image_dir)
+
+    Returns:
+        dict: Page record with "page", "text", "md", "items" and "images"
+    """
+    import pymupdf
+
+    file_path, page_index, image_dir = task
+    with pymupdf.open(file_path) as doc:
+        page = doc[page_index]
+        page_number = page_index + 1
+
+        # Tables first, so their text is not repeated as paragraphs
+        tables = []
+        if hasattr(page, "find_tables"):
+            for table in page.find_tables().tables:
+                rows = [[cell if cell is not None else "" for cell in row] for row in table.extract()]
+                if rows:
+                    tables.append((table.bbox, rows))
+        table_regions = [bbox for bbox, _ in tables]
+
+        blocks = []
+        sizes = Counter()
+        for block in page.get_text("dict")["blocks"]:
+            if block.get("type") != 0 or _inside(block["bbox"], table_regions):
+                continue
+            spans = [span for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            text = " ".join(" ".join(span["text"] for span in line["spans"]).strip() for line in block["lines"]).strip()
+            size = max(span["size"] for span in spans)
+            for span in spans:
+                sizes[round(span["size"], 1)] += len(span["text"])
+            blocks.append((block["bbox"], text, size))
+        body_size = sizes.most_common(1)[0][0] if sizes else 0
+
+        positioned = []
+        for bbox, text, size in blocks:
+            if body_size and size >= body_size * 1.15 and len(text) < 200 and not text.endswith('.'):
+                level = _heading_level(size, body_size)
+                positioned.append((bbox[1], {"type": "heading", "lvl": level, "value": text, "md": "#" * level + " " + text}))
+            else:
+                positioned.append((bbox[1], {"type": "text", "value": text, "md": text}))
+        for bbox, rows in tables:
+            md = "\n".join("| " + " | ".join(str(cell) for cell in row) + " |" for row in rows)
+            positioned.append((bbox[1], {"type": "table", "rows": rows, "md": md}))
+        items = [item for _, item in sorted(positioned, key=lambda entry: entry[0])]
+
+        images = []
+        for image_number, image in enumerate(page.get_images(full=True), 1):
+            extracted = doc.extract_image(image[0])
+            name = f"page_{page_number}_image_{image_number}.{extracted['ext']}"
+            with open(os.path.join(image_dir, name), 'wb') as f:
+                f.write(extracted["image"])
+            rects = page.get_image_rects(image[0])
+            rect = rects[0] if rects else None
+            images.append({
+                "name": name,
+                "width": rect.width if rect else extracted["width"],
+                "height": rect.height if rect else extracted["height"],
+                "x": rect.x0 if rect else 0,
+                "y": rect.y0 if rect else 0,
+                "original_width": extracted["width"],
+                "original_height": extracted["height"]
+            })
+
+        md = "\n\n".join(item["md"] for item in items)
+        return {"page": page_number, "text": page.get_text("text"), "md": md, "items": items, "images": images}
+
+def parse_pdf(file_path, image_dir="./images", max_workers=None):
+    """
+    Parse a digital PDF locally, one page per task across a process pool.
+
+    Args:
+        file_path (str): Path to the PDF
+        image_dir (str): Directory to save extracted images
+        max_workers (int, optional): Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        list: JSON result in the same shape as LlamaParse's get_json_result
+    """
+    import pymupdf
+
+    os.makedirs(image_dir, exist_ok=True)
+    with pymupdf.open(file_path) as doc:
+        page_count = doc.page_count
+    tasks = [(file_path, page_index, image_dir) for page_index in range(page_count)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pages = list(executor.map(parse_pdf_page, tasks, chunksize=max(1, page_count // 64)))
+    return [{"job_id": local_job_id(file_path), "file_path": file_path, "pages": pages}]
+
+def parse_docx(file_path, image_dir="./images"):
+    """
+    Parse a .docx file locally. Word documents have no fixed pages, so the
+    whole body is returned as a single page.
+
+    Args:
+        file_path (str): Path to the .docx file
+        image_dir (str): Directory to save extracted images
+
+    Returns:
+        list: JSON result in the same shape as LlamaParse's get_json_result
+    """
+    import docx
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    from PIL import Image
+
+    os.makedirs(image_dir, exist_ok=True)
+    document = docx.Document(file_path)
+
+    items = []
+    for element in document.element.body.iterchildren():
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag == 'p':
+            paragraph = Paragraph(element, document)
+            text = paragraph.text.strip()
+            if not text:
+                continue
+            style = paragraph.style.name if paragraph.style is not None else ""
+            # The document title is kept as text: as a level-1 heading it would be a sibling
+            # of the "Heading 1" sections instead of wrapping them
+            match = re.match(r"Heading (\d)", style)
+            if match:
+                level = int(match.group(1))
+                items.append({"type": "heading", "lvl": level, "value": text, "md": "#" * level + " " + text})
+            else:
+                items.append({"type": "text", "value": text, "md": text})
+        elif tag == 'tbl':
+            table = Table(element, document)
+            rows = [[cell.text.strip() for cell in row.cells] for row in table.rows]
+            md = "\n".join("| " + " | ".join(row) + " |" for row in rows)
+            items.append({"type": "table", "rows": rows, "md": md})
+
+    images = []
+    image_parts = [part for part in document.part.related_parts.values() if part.content_type.startswith("image/")]
+    for image_number, part in enumerate(image_parts, 1):
+        extension = os.path.splitext(part.partname)[1] or ".png"
+        name = f"page_1_image_{image_number}{extension}"
+        with open(os.path.join(image_dir, name), 'wb') as f:
+            f.write(part.blob)
+        with Image.open(BytesIO(part.blob)) as img:
+            width, height = img.size
+        images.append({
+            "name": name,
+            "width": width,
+            "height": height,
+            "x": 0,
+            "y": 0,
+            "original_width": width,
+            "original_height": height
+        })
+
+    md = "\n\n".join(item["md"] for item in items)
+    text = "\n\n".join(item["value"] if item["type"] != "table" else item["md"] for item in items)
+    page = {"page": 1, "text": text, "md": md, "items": items, "images": images}
+    return [{"job_id": local_job_id(file_path), "file_path": file_path, "pages": [page]}]
+
+def can_parse_locally(file_path):
+    """
+    Whether the local backend can handle a document: .docx files and PDFs with a text layer.
+
+    Args:
+        file_path (str): Path to the document
+
+    Returns:
+        bool: True if the local parser should be used
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    try:
+        if extension == ".docx":
+            if importlib.util.find_spec("docx") is None:
+                raise ImportError("No module named 'docx'")
+            return True
+        if extension == ".pdf":
+            return not is_scanned_pdf(file_path)
+    except ImportError as e:
+        print(f"Local parser unavailable ({e}), using LlamaParse")
+    return False
+
+def parse_local(file_path, image_dir="./images", max_workers=None):
+    """
+    Parse a document with the local backend.
+
+    Args:
+        file_path (str): Path to a .pdf or .docx document
+        image_dir (str): Directory to save extracted images
+        max_workers (int, optional): Number of worker processes for PDFs
+
+    Returns:
+        list: JSON result in the same shape as LlamaParse's get_json_result
+    """
+    if file_path.lower().endswith(".docx"):
+        return parse_docx(file_path, image_dir)
+    return parse_pdf(file_path, image_dir, max_workers)
@@ -1,77 +1,138 @@
 import json
-from document_parser import extract_text_and_tables
+import os
+from document_parser import iter_text_and_tables
+from parse_cache import get_parsed_document, iter_cached_pages
 from tools import clear_images_folder, PresentationSummarizer
-from text_chunker import chunk_text
+from image_catalog import ImageCatalog
+from text_chunker import get_token_counter, iter_token_chunks
+from boilerplate_filter import FilterReport, drop_near_duplicate_chunks, find_repeated_lines, strip_boilerplate
+from semantic_chunker import iter_semantic_chunks
 from multi_document_rag import MultiDocumentRAG
+from query_planner import QueryPlanner
 from multimodal_rag import build_image_index
 from get_image_from_web import search_and_download_image_from_web
 from tools import get_best_image
-from slide_content_generator import generate_slide_content
+from slide_content_generator import generate_slide_content, generate_slide_content_by_section
 from tools import update_image_dimensions
 from slide_content_generator import get_llm_friendly_layouts
-from presentation_pipeline import run_presentation_pipeline
+from presentation_pipeline import LayoutPrefetcher, run_presentation_pipeline
+from incremental_build import BuildState, summarize_chunks
+from model_routing import router
+from tools import PresentationIdeation
 
 def main():
     # === PARAMETERS ===
     document_path = "docs/cookbook.pdf"  # Change as needed
     image_folder = "./images"
-    min_chunk_size = 1000
-    max_chunk_size = 5000
+    max_chunk_tokens = 1200  # prompt budget for one chunk (the previous chunk is sent alongside it)
+    min_chunk_tokens = 250  # smaller chunks are merged into a neighbour, never dropped
+    semantic_chunking = False  # cut chunks at topic shifts using the RAG embedding model
+    summary_context_mode = "summary"  # "full" previous chunk, "summary" of it, "entities" digest, or "none"
+    filter_boilerplate = True  # drop running headers/footers, TOC lines and near-duplicate chunks before summarizing
     minimum_slides = 7
+    maximum_slides = 15
+    section_parallel = True  # outline first, then generate each section's slides concurrently
+    incremental = True  # reuse summaries, sections and layout mappings whose inputs did not change since the last run
+    model_routes_path = "model_routes.json"  # optional {"stage": [model, fallback, ...]} overrides of model_routing.DEFAULT_ROUTES
+    prefetch_layouts = True  # map each slide's layout as soon as it is generated, overlapping the rest of generation
+    sentence_window = None  # e.g. 2 to retrieve only ±2 sentences around the best match
+    use_fact_index = True  # answer data-point queries from the fact index when it has a match
+    use_query_planner = True  # answer queries found verbatim in the chunk text without retrieval
     chosen_template = "available_templates/A.pptx"
     output_path = "outputs/slide_whisper3.pptx"
 
     print("🚀 Starting presentation generation process...")
+    router.load_routes(model_routes_path)
 
     # 1. Clear images folder
     print("🗑️ Clearing existing images folder...")
     clear_images_folder()
+    catalog = ImageCatalog()
+    catalog.clear()
 
     # 2. Parse document and extract images/metadata
     print(f"📄 Processing document: {document_path}")
+    parsed_document = get_parsed_document(document_path, image_download_dir=image_folder, catalog=catalog)
     print("🔎 Initializing RAG and answering document queries...")
-    rag = MultiDocumentRAG()
-    # rag.process_documents([document_path])
+    rag = MultiDocumentRAG(sentence_index=sentence_window is not None)
+    rag.process_documents([document_path])  # reuses the cached parse above
 
-    with open('document_parsed.json', 'r') as f:
-        json_result = json.load(f)
-
-    # 3. Extract text and tables
+    # 3. Stream the parsed pages and extract text and tables lazily
     print("📝 Extracting text and tables from parsed document...")
-    text = extract_text_and_tables(json_result)
+    pages = iter_cached_pages(parsed_document)
+    count_tokens = get_token_counter()
+    if filter_boilerplate:
+        filter_report = FilterReport(document_path)
+        repeated_lines = find_repeated_lines(iter_cached_pages(parsed_document))
+        filter_report.repeated_lines = len(repeated_lines)
+        pages = strip_boilerplate(pages, repeated_lines, filter_report, count_tokens)
+    text = iter_text_and_tables(pages)
 
     # 4. Chunk the text
     print("✂️ Chunking text...")
-    text_chunks = chunk_text(text, min_chunk_size=min_chunk_size, max_chunk_size=max_chunk_size)
+    if semantic_chunking:
+        # Reuses the mpnet model already loaded by the RAG instance
+        text_chunks = list(iter_semantic_chunks(text, rag.embeddings, max_tokens=max_chunk_tokens, min_tokens=min_chunk_tokens, count_tokens=count_tokens))
+    else:
+        text_chunks = list(iter_token_chunks(text, max_tokens=max_chunk_tokens, min_tokens=min_chunk_tokens, count_tokens=count_tokens))
+    if filter_boilerplate:
+        # Baseline chunk count without filtering (token chunker; re-embedding for semantic chunking is not worth it)
+        unfiltered = iter_text_and_tables(iter_cached_pages(parsed_document))
+        filter_report.baseline_chunks = sum(1 for _ in iter_token_chunks(unfiltered, max_tokens=max_chunk_tokens, min_tokens=min_chunk_tokens, count_tokens=count_tokens))
+        text_chunks = drop_near_duplicate_chunks(text_chunks, report=filter_report, count_tokens=count_tokens)
+        filter_report.filtered_chunks = len(text_chunks)
+        print(filter_report.summary())
+        with open('boilerplate_report.json', 'w') as f:
+            json.dump(filter_report.as_dict(), f, indent=2)
     print(f"Generated {len(text_chunks)} text chunks.")
 
     # 5. Summarize each chunk and ideate on visualizations/queries
     print("🤖 Summarizing chunks and ideating visualizations...")
-    summarizer = PresentationSummarizer()
+    summarizer = PresentationSummarizer(context_mode=summary_context_mode)
     summarizer.clear_history()
-    summaries = []
-    for i, chunk in enumerate(text_chunks):
-        previous_chunk = text_chunks[i-1] if i > 0 else None
-        summary = summarizer.summarize_text(chunk, previous_chunk)
-        summaries.append(summary)
-        print(f"Chunk {i+1}/{len(text_chunks)} summarized.")
+    build_state = BuildState() if incremental else None
+    summaries = summarize_chunks(summarizer, text_chunks, build_state, load=lambda cached: PresentationIdeation(**cached))
+    prompt_tokens = sum(call["prompt_tokens"] or 0 for call in summarizer.usage_log)
+    print(f"Summarization used {prompt_tokens} prompt tokens with '{summary_context_mode}' context.")
 
     # 6. Use MultiDocumentRAG to answer document queries
-    query_results_from_document = []
-    for summary in summaries:
-        doc_queries = summary.additional_information_needed["document_queries"]
-        
-        for query in doc_queries:
-            print(f"\nProcessing query: {query}")
-            query_result = {"query": query,"document_response": None}
-            
-            responses = rag.get_exact_content(query, 1)
-            
+    # Collapse repeated and near-duplicate queries so each distinct question is retrieved once
+    all_queries = []
+    query_origins = {}  # query -> index of the chunk whose summary asked it first
+    for i, summary in enumerate(summaries):
+        for query in summary.additional_information_needed["document_queries"]:
+            all_queries.append(query)
+            query_origins.setdefault(query, i)
+    canonical_queries = rag.group_similar_queries(all_queries)
+    planner = QueryPlanner(text_chunks, list(set(canonical_queries.values())))
+    query_results_from_document = {}
+    for query in all_queries:
+        canonical_query = canonical_queries[query]
+        if canonical_query in query_results_from_document:
+            continue
+        print(f"\nProcessing query: {canonical_query}")
+        document_response = None
+        passage = planner.resolve(canonical_query, query_origins[canonical_query]) if use_query_planner else None
+        facts = rag.get_facts(canonical_query) if use_fact_index and passage is None else []
+        if passage is not None:
+            print(f"Found query terms in chunk {passage['chunk_index'] + 1}")
+            document_response = passage['content']
+        elif facts:
+            print("Found matching facts in fact index")
+            document_response = "\n".join(f"{fact['context']} (page {fact['page']})" for fact in facts)
+        else:
+            if sentence_window is not None:
+                responses = rag.get_sentence_window(canonical_query, 1, window=sentence_window)
+            else:
+                responses = rag.get_exact_content(canonical_query, 1)
             for response in responses:
                 print("Found relevant content in document")
-                query_result["document_response"] = response['content']
-            
-            query_results_from_document.append(query_result)
+                document_response = response['content']
+        query_results_from_document[canonical_query] = document_response
+    print(f"Answered {len(all_queries)} document queries with {len(query_results_from_document)} lookups.")
+    if use_query_planner:
+        print(f"Query planner: {planner.stats}")
+    rag.save_cache()
 
     # 7. Build image index and retrieve/download images for visualizations
     print("🖼️ Building image index and retrieving images...")
@@ -93,12 +154,10 @@ def main():
         
         # Add document responses
         for query in summary.additional_information_needed["document_queries"]:
-            for result in query_results_from_document:
-                if result["query"] == query:
-                    summary_data["retrieved_content_from_document"].append({
-                        "query": query,
-                        "response": result["document_response"]
-                    })
+            summary_data["retrieved_content_from_document"].append({
+                "query": query,
+                "response": query_results_from_document[canonical_queries[query]]
+            })
         
         # Process charts
         for query in summary.key_visualizations['charts']:
@@ -106,7 +165,7 @@ def main():
             if confidence > 0.3:
                 summary_data["key_visualizations"]["retrived_image_paths_charts"].append(image_path)
             else:
-                image_path = search_and_download_image_from_web(query)
+                image_path = search_and_download_image_from_web(query, catalog=catalog)
                 if image_path:
                     summary_data["key_visualizations"]["retrived_image_paths_charts"].append(image_path)
         
@@ -116,7 +175,7 @@ def main():
             if confidence > 0.3:
                 summary_data["key_visualizations"]["retrived_image_paths_images"].append(image_path)
             else:
-                image_path = search_and_download_image_from_web(query)
+                image_path = search_and_download_image_from_web(query, catalog=catalog)
                 if image_path:
                     summary_data["key_visualizations"]["retrived_image_paths_images"].append(image_path)
         
@@ -130,7 +189,23 @@ def main():
     with open('presentation_data.json', 'r') as f:
         presentation_data = json.load(f)
 
-    slides, metadata = generate_slide_content(presentation_data)
+    layout_specs = get_llm_friendly_layouts(chosen_template)
+    prefetcher = LayoutPrefetcher(layout_specs, catalog=catalog, build_state=build_state) if prefetch_layouts else None
+    on_slide = prefetcher.submit if prefetcher is not None else None
+    generation_metrics = {}
+
+    if section_parallel:
+        document_title = os.path.splitext(os.path.basename(document_path))[0]
+        slides, metadata = generate_slide_content_by_section(presentation_data, document_title, max_slides=maximum_slides, build_state=build_state,
+                                                             on_slide=on_slide, metrics=generation_metrics)
+    else:
+        try:
+            slides, metadata = generate_slide_content(presentation_data, on_slide=on_slide, metrics=generation_metrics)
+        except RuntimeError as e:
+            print(f"Error: {e}\nFalling back to per-section generation")
+            document_title = os.path.splitext(os.path.basename(document_path))[0]
+            slides, metadata = generate_slide_content_by_section(presentation_data, document_title, max_slides=maximum_slides, build_state=build_state,
+                                                                 on_slide=on_slide, metrics=generation_metrics)
 
     print("Generated slides:", slides)
     print("Generated metadata:", metadata)
@@ -143,11 +218,21 @@ def main():
     with open('slide_content.json', 'r') as f:
         slide_content = json.load(f)
 
-    updated_slide_content = update_image_dimensions(slide_content)
-
-    layout_specs = get_llm_friendly_layouts(chosen_template)
-
-    run_presentation_pipeline(chosen_template, output_path, 'slide_content.json', layout_specs)
+    updated_slide_content = update_image_dimensions(slide_content, catalog=catalog)
+
+    run_presentation_pipeline(chosen_template, output_path, 'slide_content.json', layout_specs, catalog=catalog, build_state=build_state,
+                              prefetcher=prefetcher)
+    if prefetcher is not None:
+        prefetcher.close()
+        generation_metrics["time_to_first_layout"] = prefetcher.time_to_first_layout
+    with open('generation_metrics.json', 'w') as f:
+        json.dump(generation_metrics, f, indent=2)
+    print(f"Generation metrics saved to generation_metrics.json: {generation_metrics}")
+    router.write_report()
+
+    if build_state is not None:
+        build_state.save()
+        build_state.write_change_report()
 
 
 
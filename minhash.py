@@ -0,0 +1,137 @@
+import json
+import os
+import re
+import zlib
+from typing import Dict, Hashable, List, Set, Tuple
+import numpy as np
+
+# Prime just above 2**32, so (a * h + b) never overflows uint64 for 32-bit hashes and coefficients
+MERSENNE_PRIME = np.uint64(4294967311)
+WORD_PATTERN = re.compile(r"\w+")
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """
+    Word shingles of a text (lowercased word n-grams).
+
+    Args:
+        text (str): Text to shingle
+        size (int): Words per shingle
+
+    Returns:
+        Set[str]: Distinct shingles; texts shorter than size give a single shingle of all their words
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+class MinHasher:
+    """MinHash signatures over word shingles, computed with one vectorized pass per text."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature of a text.
+
+        Args:
+            text (str): Text to sign
+
+        Returns:
+            np.ndarray: (num_perm,) uint64 signature
+        """
+        text_shingles = shingles(text, self.shingle_size)
+        if not text_shingles:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        # crc32 is stable across processes, unlike hash(), so signatures can be persisted
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in text_shingles), dtype=np.uint64, count=len(text_shingles))
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+def estimated_jaccard(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two texts from their MinHash signatures."""
+    return float(np.mean(signature_a == signature_b))
+
+class LSHIndex:
+    """
+    Locality-sensitive hashing over MinHash signatures: signatures are split
+    into bands, and texts sharing any band bucket become candidates, which are
+    then checked against the similarity threshold.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: Dict[Tuple[int, bytes], List[Hashable]] = {}
+        self.signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: Hashable, signature: np.ndarray) -> None:
+        """Index a signature under key."""
+        self.signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove the signature indexed under key, if any."""
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band_key in self._band_keys(signature):
+            bucket = self.buckets.get(band_key)
+            if bucket is not None and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def query(self, signature: np.ndarray) -> List[Tuple[Hashable, float]]:
+        """
+        Find indexed texts similar to a signature.
+
+        Args:
+            signature (np.ndarray): MinHash signature to look up
+
+        Returns:
+            List[Tuple[Hashable, float]]: (key, estimated Jaccard) at or above the threshold, most similar first
+        """
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self.buckets.get(band_key, ()))
+        matches = [(key, estimated_jaccard(signature, self.signatures[key])) for key in candidates]
+        return sorted([match for match in matches if match[1] >= self.threshold], key=lambda match: -match[1])
+
+    def save(self, path: str) -> None:
+        """Write the indexed signatures to a JSON file; buckets are rebuilt on load."""
+        with open(path, 'w') as f:
+            json.dump({
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "num_perm": self.bands * self.rows,
+                "signatures": {str(key): signature.tolist() for key, signature in self.signatures.items()}
+            }, f)
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.8, num_perm: int = 128, bands: int = 16) -> "LSHIndex":
+        """Load an index saved with save(), or return an empty index if the file does not exist."""
+        if not os.path.exists(path):
+            return cls(threshold=threshold, num_perm=num_perm, bands=bands)
+        with open(path, 'r') as f:
+            data = json.load(f)
+        index = cls(threshold=threshold, num_perm=data["num_perm"], bands=data["bands"])
+        for key, signature in data["signatures"].items():
+            index.add(key, np.asarray(signature, dtype=np.uint64))
+        return index
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from llm_json import request_model
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+MODEL_ROUTES_PATH = "model_routes.json"
+
+# Models to try per pipeline stage, in order; a later model is only used when the
+# previous one's output still fails validation. Easy, high-volume stages go to a
+# smaller model, deck synthesis keeps a stronger model as its fallback.
+DEFAULT_ROUTES: Dict[str, List[str]] = {
+    "summarize": ["gpt-3.5-turbo", "gpt-4o-mini"],  # PresentationSummarizer.summarize_text, one call per chunk
+    "cleanup": ["gpt-4o-mini"],  # MultiDocumentRAG chunk cleanup (free text, no fallback needed)
+    "qa": ["gpt-3.5-turbo"],  # MultiDocumentRAG.query
+    "outline": ["gpt-3.5-turbo", "gpt-4o"],  # generate_outline
+    "slides": ["gpt-3.5-turbo", "gpt-4o"],  # generate_slide_content (whole deck)
+    "section_slides": ["gpt-3.5-turbo", "gpt-4o"],  # generate_section_slides
+    "layout": ["gpt-4o-mini", "gpt-3.5-turbo"],  # get_layout_mapping
+}
+
+class ModelRouter:
+    """
+    Per-stage model routing table with fallback on validation failure, and
+    per-stage latency and token usage accounting.
+
+    Routes can be overridden without editing code by a JSON file mapping stage
+    names to a model or list of models, e.g. {"layout": ["gpt-4o-mini"]}.
+    Calls are recorded from worker threads, so recording is locked.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, List[str]]] = None):
+        self.routes = {stage: list(models) for stage, models in (routes or DEFAULT_ROUTES).items()}
+        self.stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def load_routes(self, path: str = MODEL_ROUTES_PATH) -> None:
+        """Override routes from a JSON file, if it exists; stages it does not mention keep their routes."""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            overrides = json.load(f)
+        for stage, models in overrides.items():
+            self.routes[stage] = [models] if isinstance(models, str) else list(models)
+        print(f"Model routes loaded from {path}: {self.routes}")
+
+    def models(self, stage: str) -> List[str]:
+        """Models for a stage, in fallback order."""
+        if stage not in self.routes:
+            raise ValueError(f"Unknown pipeline stage: {stage} (expected one of {', '.join(self.routes)})")
+        return self.routes[stage]
+
+    def model(self, stage: str) -> str:
+        """The primary model of a stage."""
+        return self.models(stage)[0]
+
+    def record(self, stage: str, model: str, latency: float, usage: Optional[List[Dict]] = None, ok: bool = True) -> None:
+        """
+        Record one stage call.
+
+        Args:
+            stage (str): Pipeline stage
+            model (str): Model that served the call
+            latency (float): Wall time in seconds, including any follow-up requests
+            usage (List[Dict], optional): Token counts of the API calls made, as filled in by llm_json
+            ok (bool): Whether the output was usable (False triggers a fallback)
+        """
+        usage = usage or []
+        with self._lock:
+            stage_stats = self.stats.setdefault(stage, {})
+            model_stats = stage_stats.setdefault(model, {
+                "calls": 0, "failures": 0, "api_calls": 0, "latency": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+            })
+            model_stats["calls"] += 1
+            model_stats["failures"] += 0 if ok else 1
+            model_stats["api_calls"] += len(usage)
+            model_stats["latency"] += latency
+            model_stats["prompt_tokens"] += sum(call.get("prompt_tokens") or 0 for call in usage)
+            model_stats["completion_tokens"] += sum(call.get("completion_tokens") or 0 for call in usage)
+
+    def request(self, stage: str, client, messages: List[Dict], response_model: Type[ModelT],
+                models: Optional[List[str]] = None, usage: Optional[List[Dict]] = None, **kwargs) -> ModelT:
+        """
+        request_model through the stage's routes: each model is tried in order until
+        one returns a response that validates.
+
+        Args:
+            stage (str): Pipeline stage
+            client (OpenAI): OpenAI client
+            messages (List[Dict]): Chat messages
+            response_model (Type[BaseModel]): Model the response must validate against
+            models (List[str], optional): Models to try instead of the stage's routes
+            usage (List[Dict], optional): Also receives the token counts of every call made
+            **kwargs: Passed on to request_model (temperature, max_tokens, ...)
+
+        Returns:
+            BaseModel: The validated response
+
+        Raises:
+            ValidationError: If no model's response validates
+        """
+        last_error = None
+        for model in models if models is not None else self.models(stage):
+            start = time.perf_counter()
+            calls = []
+            try:
+                response = request_model(client, messages, response_model, model=model, usage=calls, **kwargs)
+            except ValidationError as e:
+                self.record(stage, model, time.perf_counter() - start, calls, ok=False)
+                if usage is not None:
+                    usage.extend(calls)
+                print(f"{stage}: {model} output failed validation, falling back to the next model")
+                last_error = e
+                continue
+            self.record(stage, model, time.perf_counter() - start, calls)
+            if usage is not None:
+                usage.extend(calls)
+            return response
+        raise last_error
+
+    def report(self) -> Dict:
+        """
+        Per-stage totals and per-model breakdown.
+
+        Returns:
+            Dict: stage -> {"calls", "failures", "latency", "mean_latency", "prompt_tokens", "completion_tokens", "models"}
+        """
+        with self._lock:
+            report = {}
+            for stage, stage_stats in self.stats.items():
+                totals = {key: sum(model_stats[key] for model_stats in stage_stats.values())
+                          for key in ("calls", "failures", "api_calls", "latency", "prompt_tokens", "completion_tokens")}
+                totals["mean_latency"] = totals["latency"] / totals["calls"] if totals["calls"] else 0.0
+                totals["models"] = {model: dict(model_stats) for model, model_stats in stage_stats.items()}
+                report[stage] = totals
+            return report
+
+    def write_report(self, path: str = "stage_metrics.json") -> Dict:
+        """Print a one-line summary per stage and save the full report."""
+        report = self.report()
+        for stage, totals in report.items():
+            print(f"{stage}: {totals['calls']} calls ({totals['failures']} fell back), {totals['latency']:.1f}s, "
+                  f"{totals['prompt_tokens']} prompt + {totals['completion_tokens']} completion tokens")
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Stage metrics saved to {path}")
+        return report
+
+# Shared by all pipeline modules, like their module-level OpenAI clients
+router = ModelRouter()
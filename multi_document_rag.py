@@ -1,7 +1,21 @@
+import copy
+import hashlib
+import json
 import os
 import shutil
-from typing import List, Dict
-from document_parser import process_document
+import time
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from document_parser import build_section_tree, get_scope_sections
+from parse_cache import get_parsed_document, iter_cached_pages
+from document_model import ParsedDocument
+from vector_store import NumpyVectorStore
+from lexical_index import BM25Index, is_literal_query, reciprocal_rank_fusion
+from retrieval_cache import LRUCache, normalize_query
+from sentence_window import SentenceWindowIndex
+from fact_index import FactIndex
+from minhash import LSHIndex, MinHasher
+from model_routing import router
 from langchain_chroma import Chroma
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -18,7 +32,11 @@ class MultiDocumentRAG:
                  persist_directory: str = "./chroma_db",
                  chunk_size: int = 3000,
                  chunk_overlap: int = 200,
-                 force_recreate: bool = False):
+                 force_recreate: bool = False,
+                 vector_backend: str = "chroma",
+                 cache_size: int = 1024,
+                 sentence_index: bool = False,
+                 dedupe_threshold: Optional[float] = 0.85):
         """
         Initialize the MultiDocumentRAG system.
         
@@ -27,6 +45,14 @@ class MultiDocumentRAG:
             chunk_size (int): Size of text chunks for splitting documents
             chunk_overlap (int): Overlap between chunks
             force_recreate (bool): Whether to force recreation of the database even if it exists
+            vector_backend (str): "chroma" for a persistent Chroma collection, or "numpy" for the
+                embedded flat index in vector_store.py (faster startup for single-document runs)
+            cache_size (int): Maximum number of retrieval results kept in the LRU cache
+            sentence_index (bool): Whether to also index individual sentences during ingestion
+                so get_sentence_window can return short windows instead of whole chunks
+            dedupe_threshold (float, optional): Estimated Jaccard similarity above which a new chunk
+                is treated as a near-duplicate of an indexed one and only recorded as its alias;
+                None indexes every chunk
         """
         self.persist_directory = persist_directory
         self.chunk_size = chunk_size
@@ -53,15 +79,77 @@ class MultiDocumentRAG:
         )
         
         # Initialize vector store
-        self.vectorstore = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=self.embeddings
-        )
+        if vector_backend == "chroma":
+            self.vectorstore = Chroma(
+                persist_directory=persist_directory,
+                embedding_function=self.embeddings
+            )
+        elif vector_backend == "numpy":
+            self.vectorstore = NumpyVectorStore(
+                embedding_function=self.embeddings,
+                persist_directory=persist_directory
+            )
+        else:
+            raise ValueError(f"Unknown vector backend: {vector_backend}")
+        self.vector_backend = vector_backend
+        
+        # Initialize lexical index kept next to the vector store
+        self.lexical_index_path = os.path.join(persist_directory, "bm25_index.json")
+        self.lexical_index = BM25Index.load(self.lexical_index_path)
         
-        # Initialize LLM and QA chain
+        # Initialize heading trees of ingested documents (source -> root sections)
+        self.section_trees_path = os.path.join(persist_directory, "section_tree.json")
+        self.section_trees = {}
+        if os.path.exists(self.section_trees_path):
+            with open(self.section_trees_path, 'r') as f:
+                self.section_trees = json.load(f)
+        
+        # Initialize index of numbers, dates, amounts and table cells for data-point queries
+        self.fact_index_path = os.path.join(persist_directory, "fact_index.json")
+        self.fact_index = FactIndex.load(self.fact_index_path)
+        
+        # Initialize near-duplicate detection over indexed chunks (MinHash signatures + LSH)
+        # and the aliases of chunks suppressed as near-duplicates (representative chunk_id -> aliases)
+        self.dedupe_threshold = dedupe_threshold
+        self.minhasher = MinHasher()
+        self.minhash_index_path = os.path.join(persist_directory, "minhash_index.json")
+        self.minhash_index = LSHIndex.load(self.minhash_index_path, threshold=dedupe_threshold or 1.0)
+        self.chunk_aliases_path = os.path.join(persist_directory, "chunk_aliases.json")
+        self.chunk_aliases = {}
+        if os.path.exists(self.chunk_aliases_path):
+            with open(self.chunk_aliases_path, 'r') as f:
+                self.chunk_aliases = json.load(f)
+        
+        # Initialize optional sentence-level index
+        self.sentence_index = None
+        if sentence_index:
+            self.sentence_index = SentenceWindowIndex(
+                self.embeddings, os.path.join(persist_directory, "sentences")
+            )
+        
+        # Initialize retrieval caches; keys include the collection version so
+        # results from before the last ingestion are never served
+        self.collection_version_path = os.path.join(persist_directory, "collection_version.txt")
+        self.collection_version = 0
+        if os.path.exists(self.collection_version_path):
+            with open(self.collection_version_path, 'r') as f:
+                self.collection_version = int(f.read().strip() or 0)
+        self.retrieval_cache_path = os.path.join(persist_directory, "retrieval_cache.json")
+        self.retrieval_cache = LRUCache.load(self.retrieval_cache_path, max_size=cache_size)
+        self.cleaned_chunks_path = os.path.join(persist_directory, "cleaned_chunks.json")
+        self.cleaned_chunks = {}  # chunk_id -> {"content_hash": ..., "content": cleaned text}
+        if os.path.exists(self.cleaned_chunks_path):
+            with open(self.cleaned_chunks_path, 'r') as f:
+                self.cleaned_chunks = json.load(f)
+        
+        # Initialize LLMs and QA chain; models come from the "qa" and "cleanup" routes
         self.llm = ChatOpenAI(
             temperature=0,
-            model_name="gpt-3.5-turbo"
+            model_name=router.model("qa")
+        )
+        self.cleanup_llm = ChatOpenAI(
+            temperature=0,
+            model_name=router.model("cleanup")
         )
         
         self.qa_chain = RetrievalQA.from_chain_type(
@@ -89,96 +177,426 @@ class MultiDocumentRAG:
             document_paths (List[str]): List of paths to documents
         """
         total_chunks = 0
+        dedupe_report = []
         for doc_path in document_paths:
             print(f"\nProcessing document: {doc_path}")
             
-            # Process document using existing parser
-            json_result = process_document(doc_path, save_json=True)
+            # Parse the document, or reuse the cached parse of the same file content,
+            # and load it into the compact document model
+            parsed_document = ParsedDocument.from_pages(iter_cached_pages(get_parsed_document(doc_path)))
             
-            # Extract text from all pages
-            text_content = ""
-            for page in json_result[0]['pages']:
-                text_content += page['text'] + "\n\n"
-            
-            # Split text into chunks
-            texts = self.text_splitter.split_text(text_content)
-            print(f"Generated {len(texts)} chunks from {doc_path}")
-            total_chunks += len(texts)
+            # Build the heading tree and split each top-level section separately,
+            # so every chunk carries the section it belongs to
+            section_tree = build_section_tree(parsed_document)
+            self.section_trees[doc_path] = section_tree
+            self.fact_index.add_document(parsed_document, doc_path)
+            documents = []
+            for section in get_scope_sections(section_tree):
+                for t in self.text_splitter.split_text(section["text"]):
+                    documents.append(Document(
+                        page_content=t,
+                        metadata={
+                            "source": doc_path,
+                            "chunk_id": f"{os.path.basename(doc_path)}_{len(documents)}",
+                            "section": section["heading"],
+                            "section_path": " > ".join(section["path"]),
+                            "page_start": section["pages"][0] if section["pages"] else 0,
+                            "page_end": section["pages"][-1] if section["pages"] else 0
+                        }
+                    ))
+            print(f"Generated {len(documents)} chunks from {doc_path}")
+            total_chunks += len(documents)
+
+            # Chunk ids are positional, so a shortened document leaves trailing chunks behind
+            current_ids = {doc.metadata["chunk_id"] for doc in documents}
+            stale = [record["chunk_id"] for record in self.lexical_index.documents
+                     if record["source"] == doc_path and record["chunk_id"] not in current_ids]
+            if stale:
+                for chunk_id in stale:
+                    self.minhash_index.remove(chunk_id)
+                    self.chunk_aliases.pop(chunk_id, None)
+                self._delete_chunks(stale)
             
-            # Create documents with metadata
-            documents = [
-                Document(
-                    page_content=t,
-                    metadata={
-                        "source": doc_path,
-                        "chunk_id": f"{os.path.basename(doc_path)}_{i}"
-                    }
-                ) for i, t in enumerate(texts)
-            ]
+            # Keep one representative per cluster of near-identical chunks
+            if self.dedupe_threshold is not None:
+                generated = len(documents)
+                generated_characters = sum(len(doc.page_content) for doc in documents)
+                documents, replaced = self._suppress_near_duplicates(documents)
+                if replaced:
+                    # Edited chunks keep their positional id; drop the stale entries before re-adding them
+                    self._delete_chunks(replaced)
+                    print(f"Replacing {len(replaced)} edited chunks from {doc_path}")
+                suppressed = generated - len(documents)
+                dedupe_report.append({
+                    "source": doc_path,
+                    "chunks_generated": generated,
+                    "chunks_indexed": len(documents),
+                    "chunks_suppressed": suppressed,
+                    "characters_suppressed": generated_characters - sum(len(doc.page_content) for doc in documents)
+                })
+                print(f"Suppressed {suppressed} near-duplicate chunks ({suppressed / max(generated, 1):.0%}) from {doc_path}")
             
-            # Add to vector store
-            self.vectorstore.add_documents(documents)
+            # Add to vector store and lexical index (Chroma rejects an empty upsert, e.g. an unchanged re-ingestion)
+            if documents:
+                self.vectorstore.add_documents(documents)
+                chunk_records = [
+                    {
+                        "content": doc.page_content,
+                        "source": doc.metadata["source"],
+                        "chunk_id": doc.metadata["chunk_id"],
+                        "section": doc.metadata["section"]
+                    } for doc in documents
+                ]
+                self.lexical_index.add_documents(chunk_records)
+                if self.sentence_index is not None:
+                    self.sentence_index.add_chunks(chunk_records)
             print(f"Added {len(documents)} chunks to vector store from {doc_path}")
             
             # In newer versions of ChromaDB, persistence is handled automatically
             # No need to call persist() explicitly
         
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self.lexical_index.save(self.lexical_index_path)
+        with open(self.section_trees_path, 'w') as f:
+            json.dump(self.section_trees, f)
+        self.fact_index.save(self.fact_index_path)
+        if self.dedupe_threshold is not None:
+            self.minhash_index.save(self.minhash_index_path)
+            with open(self.chunk_aliases_path, 'w') as f:
+                json.dump(self.chunk_aliases, f)
+            self._report_index_reduction(dedupe_report)
+        if self.vector_backend == "numpy":
+            self.vectorstore.persist()
+        if self.sentence_index is not None:
+            self.sentence_index.persist()
+        
+        # The collection changed, so cached retrieval results are stale
+        self.collection_version += 1
+        with open(self.collection_version_path, 'w') as f:
+            f.write(str(self.collection_version))
+        self.retrieval_cache.clear()
+        self.save_cache()
+        
         # Get total document count in vector store
-        collection = self.vectorstore._collection
-        total_docs = collection.count()
+        if self.vector_backend == "numpy":
+            total_docs = len(self.vectorstore)
+        else:
+            total_docs = self.vectorstore._collection.count()
         print(f"\nVector store statistics:")
         print(f"Total documents processed: {len(document_paths)}")
         print(f"Total chunks created: {total_chunks}")
         print(f"Total chunks in vector store: {total_docs}")
 
-    def query(self, question: str) -> Dict:
+    def _suppress_near_duplicates(self, documents: List[Document]) -> Tuple[List[Document], List[str]]:
+        """
+        Drop chunks that nearly match a chunk already indexed (in this or an earlier
+        ingestion) and record them as aliases of that representative chunk. A chunk
+        matching its own id was stored by an earlier ingestion of the same document
+        and is dropped without becoming an alias of itself. A chunk whose id is
+        stored but no longer matches was edited: its old entry is forgotten and
+        the chunk is processed like a new one.
+        
+        Args:
+            documents (List[Document]): Chunks of one document, in order
+            
+        Returns:
+            tuple: (chunks to index, where representatives carry their aliases in metadata;
+                ids of edited chunks whose old vector store and index entries must be deleted)
+        """
+        kept = {}
+        replaced = []
+        batch_ids = {doc.metadata["chunk_id"] for doc in documents}
+        pending = list(documents)
+        for doc in pending:
+            chunk_id = doc.metadata["chunk_id"]
+            signature = self.minhasher.signature(doc.page_content)
+            matches = self.minhash_index.query(signature)
+            if matches and (any(match[0] == chunk_id for match in matches) or
+                            any(alias["chunk_id"] == chunk_id for alias in self.chunk_aliases.get(matches[0][0], []))):
+                continue  # unchanged since it was stored, as a representative or as an alias
+            if chunk_id in self.minhash_index.signatures:
+                # Edited representative: its aliases matched the old text, so they are deduplicated again
+                # (aliases from other documents are not re-ingested here and would otherwise be lost)
+                self.minhash_index.remove(chunk_id)
+                replaced.append(chunk_id)
+                for alias in self.chunk_aliases.pop(chunk_id, []):
+                    if alias["chunk_id"] not in batch_ids:
+                        pending.append(Document(
+                            page_content=alias["content"],
+                            metadata={
+                                "source": alias["source"],
+                                "chunk_id": alias["chunk_id"],
+                                "section": alias["section"],
+                                "section_path": alias.get("section_path", alias["section"]),
+                                "page_start": alias["page_start"],
+                                "page_end": alias["page_end"]
+                            }
+                        ))
+            for aliases in self.chunk_aliases.values():
+                aliases[:] = [alias for alias in aliases if alias["chunk_id"] != chunk_id]
+            if matches:
+                representative, similarity = matches[0]
+                self.chunk_aliases.setdefault(representative, []).append({
+                    "chunk_id": chunk_id,
+                    "source": doc.metadata["source"],
+                    "section": doc.metadata["section"],
+                    "section_path": doc.metadata["section_path"],
+                    "page_start": doc.metadata["page_start"],
+                    "page_end": doc.metadata["page_end"],
+                    "similarity": round(similarity, 3),
+                    "content": doc.page_content
+                })
+                continue
+            self.minhash_index.add(chunk_id, signature)
+            kept[chunk_id] = doc
+        
+        # Vector store metadata only holds scalars, so aliases are stored as a joined string
+        for chunk_id, doc in kept.items():
+            if chunk_id in self.chunk_aliases:
+                doc.metadata["aliases"] = ", ".join(alias["chunk_id"] for alias in self.chunk_aliases[chunk_id])
+        return list(kept.values()), replaced
+
+    def _delete_chunks(self, chunk_ids: List[str]) -> None:
+        """Remove chunks from the vector store, the BM25 index and the sentence index."""
+        if self.vector_backend == "chroma":
+            self.vectorstore._collection.delete(where={"chunk_id": {"$in": chunk_ids}})
+        else:
+            removed = set(chunk_ids)
+            self.vectorstore.delete([vector_id for vector_id, metadata in zip(self.vectorstore.ids, self.vectorstore.metadatas)
+                                     if metadata.get("chunk_id") in removed])
+        self.lexical_index.remove_documents(chunk_ids)
+        if self.sentence_index is not None:
+            self.sentence_index.remove_chunks(chunk_ids)
+
+    def _report_index_reduction(self, dedupe_report: List[Dict]) -> None:
+        """Print and save how much near-duplicate suppression shrank the index in this ingestion."""
+        generated = sum(entry["chunks_generated"] for entry in dedupe_report)
+        indexed = sum(entry["chunks_indexed"] for entry in dedupe_report)
+        dimensions = len(self.embeddings.embed_query("dimension probe")) if generated > indexed else 0
+        report = {
+            "documents": dedupe_report,
+            "chunks_generated": generated,
+            "chunks_indexed": indexed,
+            "index_size_reduction": (generated - indexed) / generated if generated else 0.0,
+            "embedding_bytes_saved": (generated - indexed) * dimensions * 4,
+            "total_aliases": sum(len(aliases) for aliases in self.chunk_aliases.values())
+        }
+        with open(os.path.join(self.persist_directory, "dedupe_report.json"), 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Near-duplicate suppression: indexed {indexed} of {generated} chunks "
+              f"({report['index_size_reduction']:.0%} smaller index, {report['embedding_bytes_saved'] / 1024:.0f} KB of vectors saved)")
+
+    def list_sections(self) -> Dict[str, List[str]]:
+        """
+        List the section scopes available for retrieval.
+        
+        Returns:
+            Dict[str, List[str]]: Section headings per ingested document
+        """
+        return {
+            source: [section["heading"] for section in get_scope_sections(tree)]
+            for source, tree in self.section_trees.items()
+        }
+
+    def query(self, question: str, k: int = 3, section: Optional[str] = None) -> Dict:
         """
         Query the RAG system with a question.
         
+        The question is embedded and searched once, and the retrieved chunks are
+        passed straight to the QA chain's document combiner, so sources and
+        scores come from the same search that grounded the answer.
+        
         Args:
             question (str): The question to ask
+            k (int): Number of chunks to retrieve
+            section (str, optional): Only search chunks from this section (see list_sections)
             
         Returns:
-            Dict: Response containing the answer and source documents
+            Dict: Response containing the answer ("result"), the source documents,
+                their sources and relevance scores (higher is more similar), and per-stage
+                timings in seconds
         """
+        cache_key = self._cache_key(f"query:{section}", question, k)
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            response = copy.deepcopy(cached)
+            response["source_documents"] = [Document(**doc) for doc in response["source_documents"]]
+            response["timings"] = {"embed": 0.0, "search": 0.0, "generate": 0.0}
+            response["cached"] = True
+            return response
+
         print("\nQuerying vector store...")
-        response = self.qa_chain.invoke(question)
-        
-        # Add source documents to response
-        source_documents = self.vectorstore.similarity_search(question, k=3)
-        sources = [doc.metadata["source"] for doc in source_documents]
-        print("Sources used for answer:", set(sources))
-        
+        start = time.perf_counter()
+        query_embedding = self.embeddings.embed_query(question)
+        embedded = time.perf_counter()
+        scored_documents = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+            query_embedding, k=k, filter=self._section_filter(section)
+        )
+        searched = time.perf_counter()
+
+        source_documents = [doc for doc, _ in scored_documents]
+        answer = self.qa_chain.combine_documents_chain.invoke({
+            "input_documents": source_documents,
+            "question": question
+        })["output_text"]
+        generated = time.perf_counter()
+        router.record("qa", router.model("qa"), generated - searched)
+
+        # The search returns distances (lower is closer); report relevance in [0, 1], higher is better,
+        # converted with the store's own function for its distance metric
+        relevance = self.vectorstore._select_relevance_score_fn()
+        sources = [
+            {
+                "source": doc.metadata["source"],
+                "chunk_id": doc.metadata["chunk_id"],
+                "score": relevance(distance)
+            } for doc, distance in scored_documents
+        ]
+        print("Sources used for answer:", {source["source"] for source in sources})
+
+        response = {
+            "query": question,
+            "result": answer,
+            "source_documents": source_documents,
+            "sources": sources,
+            "timings": {
+                "embed": embedded - start,
+                "search": searched - embedded,
+                "generate": generated - searched
+            },
+            "cached": False
+        }
+        self.retrieval_cache.put(cache_key, {
+            **response,
+            "source_documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata} for doc in source_documents
+            ]
+        })
         return response
 
-    def get_exact_content(self, query: str, k: int = 3) -> List[Dict]:
+    def get_exact_content(self, query: str, k: int = 3, mode: str = "auto", section: Optional[str] = None) -> List[Dict]:
         """
         Retrieve exact content from documents without LLM processing.
         
         Args:
             query (str): The search query
             k (int): Number of chunks to retrieve
+            mode (str): "dense" for vector search only, "lexical" for BM25 only,
+                "hybrid" for reciprocal-rank fusion of both, or "auto" to use the
+                lexical fast path for queries with quoted strings or numbers and
+                hybrid search otherwise
+            section (str, optional): Only search chunks from this section (see list_sections)
             
         Returns:
             List[Dict]: List of dictionaries containing the exact content and metadata
         """
-        # Get similar documents directly from vector store
-        documents = self.vectorstore.similarity_search(query, k=k)
+        cache_key = self._cache_key(f"exact:{mode}:{section}", query, k)
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        results = self._retrieve(query, k, mode, section)
+        self.retrieval_cache.put(cache_key, copy.deepcopy(results))
+        return results
+
+    def get_sentence_window(self, query: str, k: int = 1, window: int = 2, section: Optional[str] = None) -> List[Dict]:
+        """
+        Retrieve only the sentences around the best match instead of whole chunks.
+        Falls back to get_exact_content when no sentence index has been built.
         
-        # Format the results and ensure uniqueness
+        Args:
+            query (str): The search query
+            k (int): Number of windows to retrieve
+            window (int): Number of sentences to include on each side of the matched sentence
+            section (str, optional): Only search sentences from this section (see list_sections)
+            
+        Returns:
+            List[Dict]: List of dictionaries containing the window text, its source, the parent
+                chunk_id and the window's start/end character offsets in that chunk
+        """
+        if self.sentence_index is None or len(self.sentence_index) == 0:
+            return self.get_exact_content(query, k, section=section)
+
+        cache_key = self._cache_key(f"window:{window}:{section}", query, k)
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        results = self.sentence_index.search(self.embeddings.embed_query(query), k=k, window=window,
+                                             filter=self._section_filter(section))
+        self.retrieval_cache.put(cache_key, copy.deepcopy(results))
+        return results
+
+    def get_facts(self, query: str, limit: int = 3, min_score: float = 2.0) -> List[Dict]:
+        """
+        Answer a data-point query (a figure, date, amount or percentage) from the fact index
+        built at ingestion, without a vector search.
+        
+        Args:
+            query (str): The data-point query
+            limit (int): Maximum number of facts to return
+            min_score (float): Minimum match score; see FactIndex.lookup
+            
+        Returns:
+            List[Dict]: Matching facts with their value, source, page and surrounding context
+        """
+        return self.fact_index.lookup(query, limit=limit, min_score=min_score)
+
+    def _retrieve(self, query: str, k: int, mode: str, section: Optional[str] = None) -> List[Dict]:
+        """Run the retrieval behind get_exact_content without consulting the cache."""
+        section_filter = self._section_filter(section)
+        if mode == "auto":
+            lexical_hits = self.lexical_index.search(query, k=k, filter=section_filter) if is_literal_query(query) else []
+            if lexical_hits:
+                # Fast path: skip the embedding model entirely
+                return self._unique_results(doc for doc, _ in lexical_hits)
+            mode = "hybrid"
+
+        if mode == "lexical":
+            return self._unique_results(doc for doc, _ in self.lexical_index.search(query, k=k, filter=section_filter))
+
+        # Get similar documents directly from vector store
+        dense_hits = [
+            {
+                "content": doc.page_content,
+                "source": doc.metadata["source"],
+                "chunk_id": doc.metadata["chunk_id"]
+            } for doc in self.vectorstore.similarity_search(query, k=k, filter=section_filter)
+        ]
+        if mode == "dense" or len(self.lexical_index) == 0:
+            return self._unique_results(dense_hits)
+
+        # Fuse a deeper lexical and dense candidate list by rank
+        lexical_hits = [doc for doc, _ in self.lexical_index.search(query, k=k * 2, filter=section_filter)]
+        candidates = {doc["chunk_id"]: doc for doc in lexical_hits + dense_hits}
+        fused = reciprocal_rank_fusion([
+            [doc["chunk_id"] for doc in dense_hits],
+            [doc["chunk_id"] for doc in lexical_hits]
+        ])
+        return self._unique_results(candidates[chunk_id] for chunk_id, _ in fused[:k])
+
+    def _section_filter(self, section: Optional[str]) -> Optional[Dict]:
+        """Metadata filter restricting a vector search to one section, applied before the search."""
+        return {"section": section} if section else None
+
+    def _unique_results(self, documents) -> List[Dict]:
+        """Format retrieved chunks as result dictionaries, dropping repeated content."""
         seen_contents = set()
         results = []
         for doc in documents:
-            content = doc.page_content
+            content = doc["content"]
             # Only add if we haven't seen this content before
             if content not in seen_contents:
                 seen_contents.add(content)
                 results.append({
                     "content": content,
-                    "source": doc.metadata["source"],
-                    "chunk_id": doc.metadata["chunk_id"]
+                    "source": doc["source"],
+                    "chunk_id": doc["chunk_id"],
+                    "aliases": [
+                        {key: alias[key] for key in ("chunk_id", "source", "section", "page_start", "page_end")}
+                        for alias in self.chunk_aliases.get(doc["chunk_id"], [])
+                    ]
                 })
-            
         return results
 
     def get_cleaned_content(self, query: str, k: int = 3) -> List[Dict]:
@@ -193,37 +611,154 @@ class MultiDocumentRAG:
             List[Dict]: List of dictionaries containing the cleaned content and metadata
         """
         # Get similar documents directly from vector store
-        documents = self.vectorstore.similarity_search(query, k=k)
+        results = self.get_exact_content(query, k, mode="dense")
+        for result in results:
+            result["content"] = self._clean_chunk(result["chunk_id"], result["content"])
+        return results
+
+    def _clean_chunk(self, chunk_id: str, content: str) -> str:
+        """
+        Clean up one chunk with the LLM, reusing an earlier cleanup of the same chunk.
         
-        # Format the results and ensure uniqueness
-        seen_contents = set()
-        results = []
+        Args:
+            chunk_id (str): Chunk id from the vector store metadata
+            content (str): Raw chunk text
+            
+        Returns:
+            str: Cleaned chunk text
+        """
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        cached = self.cleaned_chunks.get(chunk_id)
+        if cached is not None and cached["content_hash"] == content_hash:
+            return cached["content"]
+
+        # Use LLM to clean up the content while preserving meaning
+        start = time.perf_counter()
+        response = self.cleanup_llm.invoke(self._cleanup_prompt(content))
+        router.record("cleanup", router.model("cleanup"), time.perf_counter() - start, [self._token_usage(response)])
+        cleaned_content = response.content
+        self.cleaned_chunks[chunk_id] = {"content_hash": content_hash, "content": cleaned_content}
+        return cleaned_content
+
+    @staticmethod
+    def _token_usage(message) -> Dict:
+        """Token counts of a LangChain chat response, in the form model_routing records."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        return {"prompt_tokens": usage.get("input_tokens"), "completion_tokens": usage.get("output_tokens")}
+
+    def _cleanup_prompt(self, content: str) -> str:
+        return f"""Clean up the following text while preserving its exact meaning. 
+        Only fix formatting issues, remove extra whitespace, and fix any obvious typos.
+        Do not paraphrase or change the meaning in any way.
         
-        for doc in documents:
-            content = doc.page_content
-            # Only process if we haven't seen this content before
-            if content not in seen_contents:
-                seen_contents.add(content)
-                
-                # Use LLM to clean up the content while preserving meaning
-                cleanup_prompt = f"""Clean up the following text while preserving its exact meaning. 
-                Only fix formatting issues, remove extra whitespace, and fix any obvious typos.
-                Do not paraphrase or change the meaning in any way.
-                
-                Text to clean up:
-                {content}
-                
-                Cleaned text:"""
-                
-                cleaned_content = self.llm.invoke(cleanup_prompt).content
-                
-                results.append({
-                    "content": cleaned_content,
-                    "source": doc.metadata["source"],
-                    "chunk_id": doc.metadata["chunk_id"]
-                })
+        Text to clean up:
+        {content}
+        
+        Cleaned text:"""
+
+    def get_cleaned_content_batch(self, queries: List[str], k: int = 3, max_concurrency: int = 8,
+                                  section: Optional[str] = None) -> List[List[Dict]]:
+        """
+        Retrieve and clean content for many queries at once.
+        
+        Every unique chunk retrieved across all queries is cleaned once, with up to
+        max_concurrency LLM calls in flight, instead of one call per chunk per query.
+        
+        Args:
+            queries (List[str]): The search queries
+            k (int): Number of chunks to retrieve per query
+            max_concurrency (int): Maximum number of concurrent cleanup calls
+            section (str, optional): Only search chunks from this section (see list_sections)
             
-        return results
+        Returns:
+            List[List[Dict]]: One list of cleaned results per query, in query order
+        """
+        all_results = [self.get_exact_content(query, k, mode="dense", section=section) for query in queries]
+
+        # Collect chunks that still need cleaning, deduplicated by content
+        pending = {}  # content hash -> (chunk_ids, content)
+        for results in all_results:
+            for result in results:
+                content_hash = hashlib.sha256(result["content"].encode("utf-8")).hexdigest()
+                cached = self.cleaned_chunks.get(result["chunk_id"])
+                if cached is not None and cached["content_hash"] == content_hash:
+                    continue
+                chunk_ids, _ = pending.setdefault(content_hash, (set(), result["content"]))
+                chunk_ids.add(result["chunk_id"])
+
+        if pending:
+            print(f"Cleaning {len(pending)} unique chunks (max {max_concurrency} concurrent)...")
+            pending_items = list(pending.items())
+            start = time.perf_counter()
+            responses = self.cleanup_llm.batch(
+                [self._cleanup_prompt(content) for _, (_, content) in pending_items],
+                config={"max_concurrency": max_concurrency}
+            )
+            # One record for the batch: its latency is the wall time of the concurrent calls
+            router.record("cleanup", router.model("cleanup"), time.perf_counter() - start,
+                          [self._token_usage(response) for response in responses])
+            for (content_hash, (chunk_ids, _)), response in zip(pending_items, responses):
+                for chunk_id in chunk_ids:
+                    self.cleaned_chunks[chunk_id] = {"content_hash": content_hash, "content": response.content}
+
+        for results in all_results:
+            for result in results:
+                result["content"] = self.cleaned_chunks[result["chunk_id"]]["content"]
+        return all_results
+
+    def _cache_key(self, kind: str, query: str, k: int) -> str:
+        """Build a retrieval cache key from the normalized query, k and collection version."""
+        return json.dumps([kind, normalize_query(query), k, self.collection_version])
+
+    def save_cache(self) -> None:
+        """Persist the retrieval and cleaned-chunk caches next to the vector store."""
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self.retrieval_cache.save(self.retrieval_cache_path)
+        with open(self.cleaned_chunks_path, 'w') as f:
+            json.dump(self.cleaned_chunks, f)
+        print(f"Retrieval cache: {self.retrieval_cache.hits} hits, {self.retrieval_cache.misses} misses")
+
+    def group_similar_queries(self, queries: List[str], threshold: float = 0.92) -> Dict[str, str]:
+        """
+        Collapse exact and semantically near-duplicate queries onto one canonical query.
+        
+        Args:
+            queries (List[str]): Queries to group, in order of first appearance
+            threshold (float): Cosine similarity above which two queries are treated as the same
+            
+        Returns:
+            Dict[str, str]: Mapping from every input query to its canonical query
+        """
+        canonical = {}
+        unique_queries = []
+        seen_normalized = {}
+        for query in queries:
+            normalized = " ".join(query.lower().split())
+            if normalized in seen_normalized:
+                canonical[query] = seen_normalized[normalized]
+            else:
+                seen_normalized[normalized] = query
+                canonical[query] = query
+                unique_queries.append(query)
+
+        if len(unique_queries) < 2:
+            return canonical
+
+        # Embed all unique queries in one batch and compare them with a single matrix product
+        vectors = np.asarray(self.embeddings.embed_documents(unique_queries), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        similarity = vectors @ vectors.T
+
+        representative = list(range(len(unique_queries)))
+        for i in range(len(unique_queries)):
+            if representative[i] != i:
+                continue
+            for j in np.nonzero(similarity[i, i + 1:] >= threshold)[0] + i + 1:
+                if representative[j] == j:
+                    representative[j] = i
+
+        remapped = {query: unique_queries[representative[i]] for i, query in enumerate(unique_queries)}
+        return {query: remapped[target] for query, target in canonical.items()}
 
 def query_documents(questions, document_paths, rag, exact_content: bool = False, cleaned_content: bool = False):
     # rag = MultiDocumentRAG()
@@ -236,9 +771,10 @@ def query_documents(questions, document_paths, rag, exact_content: bool = False,
     responses = []
     
     if document_paths:
-        for question in questions:
+        cleaned_responses = rag.get_cleaned_content_batch(questions) if cleaned_content else None
+        for question_index, question in enumerate(questions):
             if cleaned_content:
-                response = rag.get_cleaned_content(question)
+                response = cleaned_responses[question_index]
                 print(f"\nQuestion: {question}")
                 print("Cleaned content from documents:")
                 for i, result in enumerate(response, 1):
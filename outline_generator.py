@@ -1,9 +1,9 @@
 # outline_generator.py
 import os
-import json
 from typing import List
 from pydantic import BaseModel, ValidationError
 from openai import OpenAI
+from model_routing import router
 
 # Initialize OpenAI client
 client = OpenAI()
@@ -19,6 +19,7 @@ class SectionOutline(BaseModel):
     heading: str
     num_content_slides: int
     slide_distribution: List[SlideDistribution]
+    source_summaries: List[int] = []  # 1-based numbers of the summaries this section draws on
 
 class DocumentOutline(BaseModel):
     title: str
@@ -37,6 +38,7 @@ PROMPT_TEMPLATE = """
       {{
         "heading": <string>,     // section heading
         "num_content_slides": <integer >= 1>,  
+        "source_summaries": [<integer>, ...],  // numbers of the text summaries this section covers
         "slide_distribution": [
           {{
             "sub_slide": <integer>,  // Sub slide number
@@ -65,29 +67,15 @@ def generate_outline(title: str, summaries: List[str], max_slides: int = 15) ->
     # Fill prompt
     prompt = PROMPT_TEMPLATE.format(
         title=title,
-        summaries="\n".join(f"- {summary}" for summary in summaries),
+        summaries="\n".join(f"[{i}] {summary}" for i, summary in enumerate(summaries, 1)),
         max_slides=max_slides
     )
 
-    # Call the LLM
-    resp = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-        max_tokens=1200,  # Increased token limit for longer responses
-    )
-
-    # Parse JSON
-    content = resp.choices[0].message.content.strip()
-    try:
-        outline_dict = json.loads(content)
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"LLM returned invalid JSON:\n{content}") from e
-
-    # Validate with Pydantic
+    # Call the LLM; the JSON is repaired and only invalid sections are re-requested
+    messages = [{"role": "user", "content": prompt}]
     try:
-        outline = DocumentOutline.model_validate(outline_dict)
+        outline = router.request("outline", client, messages, DocumentOutline, temperature=0.3, max_tokens=1200)
     except ValidationError as e:
         raise RuntimeError(f"Outline validation failed:\n{e}") from e
 
-    return outline
\ No newline at end of file
+    return outline
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from document_parser import process_document, iter_pages
+from local_parser import can_parse_locally
+
+PARSE_CACHE_DIR = "./parse_cache"
+PAGES_FILE = "pages.ndjson"
+IMAGE_METADATA_FILE = "image_metadata.json"
+IMAGES_DIR = "images"
+ENTRY_FILE = "entry.json"
+
+def parse_cache_key(file_path, parser_options):
+    """
+    Build the cache key for a document: a hash of its content and the parser options.
+    The backend is keyed as the one process_document would actually use, so switching
+    between LlamaParse and the local parser never returns the other backend's parse.
+
+    Args:
+        file_path (str): Path to the source document
+        parser_options (dict): Options that change the parse result
+
+    Returns:
+        str: Hex digest identifying the parse
+    """
+    parser_options = dict(parser_options)
+    backend = parser_options.get("backend", "auto")
+    if backend == "auto":
+        backend = "local" if can_parse_locally(file_path) else "llamaparse"
+    parser_options["backend"] = backend
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    digest.update(json.dumps(parser_options, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def get_parsed_document(file_path, cache_dir=PARSE_CACHE_DIR, image_download_dir="./images", catalog=None, **parser_options):
+    """
+    Return the cached parse of a document, parsing it only if this exact file
+    content has not been parsed with these options before. The cached images
+    are copied into image_download_dir either way.
+
+    Args:
+        file_path (str): Path to the document to parse
+        cache_dir (str): Directory holding the parse cache
+        image_download_dir (str): Directory downstream stages read images from
+        catalog (ImageCatalog, optional): Image catalog to record the restored images in
+        **parser_options: Options forwarded to process_document (e.g. language)
+
+    Returns:
+        str: Cache entry directory containing pages.ndjson, image_metadata.json and images/
+    """
+    key = parse_cache_key(file_path, parser_options)
+    entry_dir = os.path.join(cache_dir, key)
+
+    if os.path.exists(os.path.join(entry_dir, ENTRY_FILE)):
+        print(f"Using cached parse of {file_path} ({key[:12]})")
+    else:
+        print(f"No cached parse of {file_path}, parsing...")
+        os.makedirs(cache_dir, exist_ok=True)
+        # Build the entry in a scratch directory so an interrupted parse is never cached
+        scratch_dir = tempfile.mkdtemp(dir=cache_dir)
+        os.makedirs(os.path.join(scratch_dir, IMAGES_DIR))
+        json_result = process_document(
+            file_path,
+            json_output_filename=os.path.join(scratch_dir, PAGES_FILE),
+            image_download_dir=os.path.join(scratch_dir, IMAGES_DIR),
+            image_metadata_filename=os.path.join(scratch_dir, IMAGE_METADATA_FILE),
+            save_json=True,
+            **parser_options
+        )
+        with open(os.path.join(scratch_dir, ENTRY_FILE), 'w') as f:
+            json.dump({
+                "source": file_path,
+                "job_id": json_result[0].get('job_id'),
+                "parser_options": parser_options
+            }, f, indent=2)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.rename(scratch_dir, entry_dir)
+
+    restore_images(entry_dir, image_download_dir, catalog=catalog, source=file_path)
+    return entry_dir
+
+def restore_images(entry_dir, image_download_dir="./images", catalog=None, source=None):
+    """
+    Copy a cache entry's extracted images into the working images folder and,
+    if a catalog is given, record each one with the dimensions the parser reported.
+
+    Args:
+        entry_dir (str): Cache entry directory
+        image_download_dir (str): Directory downstream stages read images from
+        catalog (ImageCatalog, optional): Image catalog to record the images in
+        source (str, optional): Source document path stored in the catalog
+    """
+    os.makedirs(image_download_dir, exist_ok=True)
+    source_dir = os.path.join(entry_dir, IMAGES_DIR)
+    for filename in os.listdir(source_dir):
+        target = os.path.join(image_download_dir, filename)
+        if not os.path.exists(target):
+            shutil.copy2(os.path.join(source_dir, filename), target)
+
+    if catalog is None:
+        return
+    with open(os.path.join(entry_dir, IMAGE_METADATA_FILE), 'r') as f:
+        image_metadata = json.load(f)
+    for img in image_metadata:
+        target = os.path.join(image_download_dir, img['name'])
+        if not os.path.exists(target):
+            continue
+        # Older cache entries only stored the on-page size, so leave pixel dimensions unknown for them
+        catalog.add_image(
+            target,
+            width=img.get('original_width'),
+            height=img.get('original_height'),
+            source_type="document",
+            source=source,
+            page=img.get('page')
+        )
+
+def iter_cached_pages(entry_dir):
+    """Stream the page records of a cache entry."""
+    return iter_pages(os.path.join(entry_dir, PAGES_FILE))
+
+def load_parsed_document(entry_dir):
+    """
+    Load a cache entry in the LlamaParse JSON result shape.
+
+    Args:
+        entry_dir (str): Cache entry directory from get_parsed_document
+
+    Returns:
+        list: [{"job_id": ..., "pages": [...]}], as returned by process_document
+    """
+    with open(os.path.join(entry_dir, ENTRY_FILE), 'r') as f:
+        entry = json.load(f)
+    return [{"job_id": entry["job_id"], "pages": list(iter_cached_pages(entry_dir))}]
@@ -3,6 +3,7 @@ from pptx.util import Inches, Pt
 from pptx.enum.text import MSO_AUTO_SIZE
 import json
 import os
+from image_catalog import ImageCatalog
 
 # Mapping of placeholder type numbers to their names
 PLACEHOLDER_TYPES = {
@@ -52,7 +53,7 @@ def get_available_layouts(prs: Presentation) -> list:
         layouts.append(name)
     return layouts
 
-def create_presentation_from_template(template_path, output_path, layouts_json_path):
+def create_presentation_from_template(template_path, output_path, layouts_json_path, catalog=None):
     """
     Create a presentation using an existing template and layout data.
     
@@ -60,6 +61,7 @@ def create_presentation_from_template(template_path, output_path, layouts_json_p
         template_path (str): Path to the PowerPoint template (.pptx)
         output_path (str): Path where the new presentation will be saved
         layouts_json_path (str): Path to the JSON file containing slide layouts
+        catalog (ImageCatalog, optional): Image catalog used to resolve image paths (defaults to the project catalog)
     """
     # Image name mapping
     image_name_mapping = {
@@ -74,6 +76,9 @@ def create_presentation_from_template(template_path, output_path, layouts_json_p
         "comparison_of_funding_rounds_in_airbnb's_growth_jo.jpg": "comparison_of_funding_rounds_between_airbnb_and_wi.jpg"
     }
     
+    if catalog is None:
+        catalog = ImageCatalog()
+
     # Load the template
     prs = Presentation(template_path)
     
@@ -196,38 +201,32 @@ def create_presentation_from_template(template_path, output_path, layouts_json_p
                 print(f"\nAdding Image:")
                 print(f"- Image path: {img_path}")
                 
-                # Try different possible image paths
-                possible_paths = [
-                    img_path,  # Try direct path first
-                    os.path.join("images", img_path),  # Try in images folder
-                    os.path.join("images", img_path.lower()),  # Try lowercase version
-                    os.path.join("images", img_path.replace(" ", "_")),  # Try with underscores
-                    os.path.join("images", img_path.replace(" ", "_").lower()),  # Try both
-                    os.path.join("images", image_name_mapping.get(img_path, img_path))  # Try mapped name
-                ]
-                
-                image_found = False
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        try:
-                            # Get placeholder dimensions
-                            left = picture_shape.left
-                            top = picture_shape.top
-                            width = picture_shape.width
-                            height = picture_shape.height
-                            
-                            # Add the image
-                            slide.shapes.add_picture(path, left, top, width, height)
-                            print(f"✅ Image added successfully from: {path}")
-                            image_found = True
-                            break
-                        except Exception as e:
-                            print(f"⚠️ Error adding image from {path}: {str(e)}")
-                
-                if not image_found:
-                    print(f"⚠️ Image not found in any of these locations:")
-                    for path in possible_paths:
-                        print(f"  - {path}")
+                # Resolve the image through the catalog (exact name, then case/underscore-insensitive, then mapped name)
+                path = catalog.resolve_path(img_path) or catalog.resolve_path(image_name_mapping.get(img_path, img_path))
+                if path is None:
+                    # Images added by hand or left in ./images by an earlier run are not in the catalog
+                    possible_paths = [
+                        img_path,
+                        os.path.join("images", img_path),
+                        os.path.join("images", img_path.replace(" ", "_").lower()),
+                        os.path.join("images", image_name_mapping.get(img_path, img_path))
+                    ]
+                    path = next((candidate for candidate in possible_paths if os.path.exists(candidate)), None)
+                if path is not None:
+                    try:
+                        # Get placeholder dimensions
+                        left = picture_shape.left
+                        top = picture_shape.top
+                        width = picture_shape.width
+                        height = picture_shape.height
+                        
+                        # Add the image
+                        slide.shapes.add_picture(path, left, top, width, height)
+                        print(f"✅ Image added successfully from: {path}")
+                    except Exception as e:
+                        print(f"⚠️ Error adding image from {path}: {str(e)}")
+                else:
+                    print(f"⚠️ Image not found in image catalog or images folder: {img_path}")
                 break  # Stop after trying to add image to first available picture placeholder
     
     # Save the presentation
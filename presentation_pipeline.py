@@ -1,9 +1,14 @@
 import json
-from slide_content_generator import build_prompt_with_placeholder_indices_and_dimensions
+import time
+from concurrent.futures import ThreadPoolExecutor
+from slide_content_generator import LayoutMapping, build_prompt_with_placeholder_indices_and_dimensions
 from create_slide import create_slide_from_content
+from incremental_build import content_hash
+from model_routing import router
 from openai import OpenAI
 
-def run_presentation_pipeline(template_path, output_path, slide_contents_path, layout_specs):
+def run_presentation_pipeline(template_path, output_path, slide_contents_path, layout_specs, catalog=None, build_state=None,
+                              prefetcher=None):
     """
     Run the complete presentation generation pipeline.
     
@@ -12,6 +17,11 @@ def run_presentation_pipeline(template_path, output_path, slide_contents_path, l
         output_path (str): Path where the final presentation will be saved
         slide_contents_path (str): Path to the JSON file containing slide contents
         layout_specs (list): List of available layout specifications
+        catalog (ImageCatalog, optional): Image catalog used to resolve image paths
+        build_state (BuildState, optional): Results of the previous run; layout mappings of
+            slides whose content and the template's layouts are unchanged are reused
+        prefetcher (LayoutPrefetcher, optional): Layout mappings already started while the slides
+            were being generated; slides it has not seen are mapped here
     """
     # Load slide contents
     with open(slide_contents_path, 'r') as f:
@@ -21,10 +31,10 @@ def run_presentation_pipeline(template_path, output_path, slide_contents_path, l
     
     # Process each slide content
     for content in slide_contents:
-        # Build prompt for layout selection
-        prompt = build_prompt_with_placeholder_indices_and_dimensions(content, layout_specs)
-        
-        layout_mapping = get_layout_mapping(prompt)
+        if prefetcher is not None:
+            layout_mapping = prefetcher.result(content)
+        else:
+            layout_mapping = map_slide_layout(content, layout_specs, build_state)
         layout_mappings.append(layout_mapping)
 
         print(layout_mapping)
@@ -39,26 +49,88 @@ def run_presentation_pipeline(template_path, output_path, slide_contents_path, l
 
 
     # Create the final presentation
-    create_slide_from_content(template_path, output_path, layout_mappings)
+    create_slide_from_content(template_path, output_path, layout_mappings, catalog=catalog)
+
+def layout_key(content, layout_specs):
+    """Cache key of a slide's layout mapping. The slide number is left out so inserting a slide does not invalidate later mappings."""
+    return content_hash({field: value for field, value in content.items() if field != 'slide'}, layout_specs)
+
+def map_slide_layout(content, layout_specs, build_state=None):
+    """
+    Choose a layout for one slide and map its content to the layout's placeholders.
+
+    Args:
+        content (dict): Slide content, with image dimensions
+        layout_specs (list): List of available layout specifications
+        build_state (BuildState, optional): Reuses the mapping if this content was mapped in the previous run
+
+    Returns:
+        dict: Layout mapping
+    """
+    key = layout_key(content, layout_specs)
+    layout_mapping = build_state.get("layouts", key, label=f"slide {content.get('slide')}") if build_state is not None else None
+    if layout_mapping is None:
+        # Build prompt for layout selection
+        prompt = build_prompt_with_placeholder_indices_and_dimensions(content, layout_specs)
+        
+        layout_mapping = get_layout_mapping(prompt)
+        if build_state is not None:
+            build_state.put("layouts", key, layout_mapping)
+    return layout_mapping
+
+class LayoutPrefetcher:
+    """
+    Starts layout mapping for slides while the rest of the deck is still being
+    generated. submit() is passed as the on_slide callback of slide generation:
+    it sizes the slide's images (on the calling thread, since the image catalog
+    is a SQLite connection) and maps the layout on a worker thread.
+    run_presentation_pipeline then collects the mappings with result().
+    """
+
+    def __init__(self, layout_specs, catalog=None, build_state=None, max_workers=4):
+        self.layout_specs = layout_specs
+        self.catalog = catalog
+        self.build_state = build_state
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = {}
+        self.start = time.perf_counter()
+        self.time_to_first_layout = None
+
+    def submit(self, slide):
+        """Start mapping the layout of a generated Slide."""
+        from tools import update_image_dimensions
+
+        content = update_image_dimensions([slide.model_dump()], catalog=self.catalog, save_path=None)[0]
+        key = layout_key(content, self.layout_specs)
+        if key not in self.futures:
+            self.futures[key] = self.executor.submit(self._map, content)
+
+    def _map(self, content):
+        layout_mapping = map_slide_layout(content, self.layout_specs, self.build_state)
+        if self.time_to_first_layout is None:
+            self.time_to_first_layout = time.perf_counter() - self.start
+        return layout_mapping
+
+    def result(self, content):
+        """The layout mapping of a slide, waiting for it if it was submitted, otherwise mapping it now."""
+        future = self.futures.get(layout_key(content, self.layout_specs))
+        if future is None:
+            return map_slide_layout(content, self.layout_specs, self.build_state)
+        return future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
 
 def get_layout_mapping(prompt):
     client = OpenAI()
     
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a presentation expert who maps content to appropriate slide layouts."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        max_tokens=1000
-    )
-
-    layout_mapping = response.choices[0].message.content.strip()
-    layout_mapping = layout_mapping.replace('```json', '').replace('```', '').rstrip(',')
-    layout_mapping = json.loads(layout_mapping)
+    messages = [
+        {"role": "system", "content": "You are a presentation expert who maps content to appropriate slide layouts."},
+        {"role": "user", "content": prompt}
+    ]
+    layout_mapping = router.request("layout", client, messages, LayoutMapping, temperature=0.7, max_tokens=1000)
     
-    return layout_mapping
+    return layout_mapping.model_dump()
 
 # if __name__ == "__main__":
 #     # Example usage
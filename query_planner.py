@@ -0,0 +1,221 @@
+import re
+from collections import deque, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from lexical_index import tokenize, quoted_phrases
+from fact_index import STOPWORDS
+
+class AhoCorasick:
+    """Aho-Corasick automaton for finding many patterns in one pass over a text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern in set(patterns):
+            if pattern:
+                self._insert(pattern)
+        self._build()
+
+    def _insert(self, pattern: str) -> None:
+        state = 0
+        for char in pattern:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Find every occurrence of every pattern.
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            List[Tuple[int, str]]: (start offset, pattern) pairs
+        """
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for pattern in self.output[state]:
+                matches.append((position - len(pattern) + 1, pattern))
+        return matches
+
+# Question scaffolding that says nothing about where the answer is
+QUESTION_WORDS = {
+    "much", "many", "where", "why", "when", "whom", "whose", "mention", "mentioned", "mentions",
+    "information", "details", "detail", "regarding", "provide", "list", "describe", "explain",
+}
+
+# Word endings tolerated after a key term, so "raise" also matches "raised"
+INFLECTIONS = ("", "s", "es", "d", "ed", "ing", "'s")
+
+def normalize_for_matching(text: str) -> Tuple[str, List[int]]:
+    """
+    Normalize text the way key terms are: lowercased, thousands separators
+    removed ("1,000" -> "1000", as lexical_index.tokenize does) and whitespace
+    runs collapsed to one space.
+
+    Returns:
+        Tuple[str, List[int]]: The normalized text and, for each of its characters, the offset in text
+    """
+    chars = []
+    offsets = []
+    for i, char in enumerate(text):
+        if char == ',' and 0 < i < len(text) - 1 and text[i - 1].isdigit() and text[i + 1].isdigit():
+            continue
+        if char.isspace():
+            if chars and chars[-1] == ' ':
+                continue
+            char = ' '
+        for lowered in char.lower():
+            chars.append(lowered)
+            offsets.append(i)
+    return "".join(chars), offsets
+
+def normalized_phrases(query: str) -> List[str]:
+    """The quoted phrases of a query, normalized like chunk text."""
+    return [normalize_for_matching(phrase)[0].strip() for phrase in quoted_phrases(query)]
+
+def key_terms(query: str) -> List[str]:
+    """
+    Pick the terms a passage must contain to answer a query: quoted phrases,
+    numbers and content words, normalized with normalize_for_matching.
+    """
+    terms = normalized_phrases(query)
+    for token in tokenize(re.sub(r"[\"“”][^\"“”]*[\"“”]", " ", query)):
+        if token not in STOPWORDS and token not in QUESTION_WORDS and (len(token) >= 3 or token[0].isdigit()):
+            terms.append(token)
+    return list(dict.fromkeys(terms))
+
+class QueryPlanner:
+    """
+    Resolve document queries from the chunk text already in memory before
+    falling back to the vector store.
+
+    One Aho-Corasick pass per chunk finds every key term of every query.
+    A query is answered locally when a short window of its originating chunk
+    (or, failing that, any other chunk) contains all of its quoted phrases and
+    most of its key terms. Chunks are matched in the normalized form of the
+    terms, so "1,000" in a chunk matches the term "1000".
+    """
+
+    def __init__(self, chunks: List[str], queries: List[str], window_chars: int = 400,
+                 min_coverage: float = 0.8, min_terms: int = 2):
+        self.chunks = chunks
+        self.window_chars = window_chars
+        self.min_coverage = min_coverage
+        self.min_terms = min_terms
+        self.stats = {"resolved_from_origin_chunk": 0, "resolved_from_other_chunk": 0, "sent_to_retrieval": 0}
+
+        self.terms = {query: key_terms(query) for query in queries}
+        automaton = AhoCorasick(term for terms in self.terms.values() for term in terms)
+        # chunk index -> term -> start offsets of whole-word matches in the normalized chunk
+        self.hits = []
+        self.offsets = []  # chunk index -> offset in the chunk of each normalized character
+        for chunk in chunks:
+            normalized, offsets = normalize_for_matching(chunk)
+            chunk_hits = defaultdict(list)
+            for start, term in automaton.find_all(normalized):
+                if self._is_word_match(normalized, start, term):
+                    chunk_hits[term].append(start)
+            self.hits.append(chunk_hits)
+            self.offsets.append(offsets)
+
+    def _is_word_match(self, text: str, start: int, term: str) -> bool:
+        """Whether a match starts on a word boundary and ends on one, allowing a short inflection."""
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        end = start + len(term)
+        word_end = end
+        while word_end < len(text) and (text[word_end].isalnum() or text[word_end] == "'"):
+            word_end += 1
+        if term[-1].isdigit() or len(term) < 4:
+            return word_end == end
+        return text[end:word_end] in INFLECTIONS
+
+    def resolve(self, query: str, origin_chunk: Optional[int] = None) -> Optional[Dict]:
+        """
+        Try to answer a query from chunk text.
+
+        Args:
+            query (str): A query passed to the constructor
+            origin_chunk (int, optional): Index of the chunk the query was generated from
+
+        Returns:
+            Dict or None: The matching passage with "content", "chunk_index", "start" and "end"
+                offsets into that chunk, or None if the query should go to retrieval
+        """
+        terms = self.terms.get(query) or key_terms(query)
+        phrases = normalized_phrases(query)
+        # A quoted phrase is specific enough on its own
+        if len(terms) >= self.min_terms or phrases:
+            candidates = [origin_chunk] if origin_chunk is not None else []
+            candidates += [i for i in range(len(self.chunks)) if i != origin_chunk]
+            for chunk_index in candidates:
+                span = self._best_window(chunk_index, terms, phrases)
+                if span is not None:
+                    self.stats["resolved_from_origin_chunk" if chunk_index == origin_chunk else "resolved_from_other_chunk"] += 1
+                    offsets = self.offsets[chunk_index]
+                    start, end = self._expand_to_sentences(self.chunks[chunk_index], offsets[span[0]], offsets[span[1] - 1] + 1)
+                    return {
+                        "content": self.chunks[chunk_index][start:end],
+                        "chunk_index": chunk_index,
+                        "start": start,
+                        "end": end
+                    }
+        self.stats["sent_to_retrieval"] += 1
+        return None
+
+    def _best_window(self, chunk_index: int, terms: List[str], phrases: List[str]) -> Optional[Tuple[int, int]]:
+        """Find the window covering the most distinct terms, if it meets the coverage rules."""
+        chunk_hits = self.hits[chunk_index]
+        if any(phrase not in chunk_hits for phrase in phrases):
+            return None
+        needed = max(len(phrases), int(len(terms) * self.min_coverage + 0.999))
+        if sum(term in chunk_hits for term in terms) < needed:
+            return None
+
+        occurrences = sorted((start, term) for term in terms for start in chunk_hits.get(term, ()))
+        counts = defaultdict(int)
+        best = None
+        left = 0
+        for right, (start, term) in enumerate(occurrences):
+            counts[term] += 1
+            while start - occurrences[left][0] > self.window_chars:
+                left_term = occurrences[left][1]
+                counts[left_term] -= 1
+                if not counts[left_term]:
+                    del counts[left_term]
+                left += 1
+            covered = len(counts)
+            if covered >= needed and all(phrase in counts for phrase in phrases):
+                if best is None or covered > best[0]:
+                    best = (covered, occurrences[left][0], start + len(term))
+        return (best[1], best[2]) if best else None
+
+    def _expand_to_sentences(self, text: str, start: int, end: int) -> Tuple[int, int]:
+        """Widen a span to the enclosing sentence boundaries."""
+        boundary = max(text.rfind(". ", 0, start), text.rfind("\n", 0, start))
+        start = boundary + 1 if boundary >= 0 else 0
+        next_stop = [position for position in (text.find(". ", end), text.find("\n", end)) if position >= 0]
+        end = min(next_stop) + 1 if next_stop else len(text)
+        return start + (len(text[start:end]) - len(text[start:end].lstrip())), end
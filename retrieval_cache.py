@@ -0,0 +1,60 @@
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse whitespace so trivially different spellings share a cache key."""
+    return " ".join(query.lower().split())
+
+class LRUCache:
+    """Least-recently-used cache with JSON persistence for JSON-serializable values."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: str):
+        return key in self.entries
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key (marking it most recently used), or None on a miss."""
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def save(self, path: str) -> None:
+        """Write the entries to a JSON file, least recently used first."""
+        with open(path, 'w') as f:
+            json.dump(list(self.entries.items()), f)
+
+    @classmethod
+    def load(cls, path: str, max_size: int = 1024) -> "LRUCache":
+        """Load a cache saved with save(), or return an empty cache if the file does not exist."""
+        cache = cls(max_size=max_size)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    for key, value in json.load(f):
+                        cache.put(key, value)
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable cache file {path}: {e}")
+        return cache
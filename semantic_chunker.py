@@ -0,0 +1,108 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from document_model import ParsedDocument
+from text_chunker import get_token_counter, iter_sentence_segments
+
+def adjacent_similarities(vectors: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity between each sentence embedding and the next, in one vectorized pass.
+
+    Args:
+        vectors (np.ndarray): (n, dim) sentence embeddings
+
+    Returns:
+        np.ndarray: (n - 1,) similarities; entry i compares sentence i with sentence i + 1
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.maximum(norms, 1e-12)
+    return np.einsum('ij,ij->i', unit[:-1], unit[1:])
+
+def iter_semantic_chunks(text_items, embeddings: Embeddings, max_tokens: int = 1200, min_tokens: int = 250,
+                         count_tokens=None, window_chunks: int = 8):
+    """
+    Chunk text at topic shifts: sentences are embedded in batches and each
+    chunk ends at the least similar pair of adjacent sentences among the cut
+    points that keep it between min_tokens and max_tokens.
+
+    Sentences are buffered in windows of about window_chunks * max_tokens so
+    the document is streamed rather than embedded all at once. Pass the
+    embeddings already loaded by MultiDocumentRAG (rag.embeddings) so no
+    second model is loaded.
+
+    Args:
+        text_items (iterable or ParsedDocument): Text strings and table data, e.g. from
+            iter_text_and_tables, or a parsed document to chunk directly
+        embeddings (Embeddings): Sentence embedding model
+        max_tokens (int): Token budget for one chunk
+        min_tokens (int): Smallest chunk, except when the whole remaining text is smaller
+        count_tokens (callable, optional): str -> int token counter (defaults to get_token_counter())
+        window_chunks (int): Number of chunks' worth of sentences embedded per batch
+
+    Yields:
+        str: Text chunks
+    """
+    if isinstance(text_items, ParsedDocument):
+        text_items = text_items.iter_text_and_tables()
+    if count_tokens is None:
+        count_tokens = get_token_counter()
+
+    segments = []
+    vectors = np.zeros((0, 0), dtype=np.float32)
+    pending_tokens = 0
+    for segment in iter_sentence_segments(text_items, max_tokens, count_tokens):
+        segments.append(segment)
+        pending_tokens += segment[1]
+        if pending_tokens >= window_chunks * max_tokens:
+            vectors = _embed_new(embeddings, segments, vectors)
+            chunks, carry = _cut_chunks(segments, vectors, max_tokens, min_tokens, final=False)
+            yield from chunks
+            segments, vectors = segments[carry:], vectors[carry:]
+            pending_tokens = sum(tokens for _, tokens in segments)
+    if segments:
+        vectors = _embed_new(embeddings, segments, vectors)
+        chunks, _ = _cut_chunks(segments, vectors, max_tokens, min_tokens, final=True)
+        yield from chunks
+
+def _embed_new(embeddings, segments, vectors):
+    """Embed the segments that do not have a vector yet, in one batch."""
+    new_segments = segments[len(vectors):]
+    if not new_segments:
+        return vectors
+    new_vectors = np.asarray(embeddings.embed_documents([text for text, _ in new_segments]), dtype=np.float32)
+    return new_vectors if len(vectors) == 0 else np.vstack([vectors, new_vectors])
+
+def _cut_chunks(segments, vectors, max_tokens, min_tokens, final):
+    """
+    Choose chunk boundaries within a window of embedded segments.
+
+    Returns:
+        tuple: (list of chunk strings, index of the first segment not yet chunked)
+    """
+    similarities = adjacent_similarities(vectors) if len(vectors) > 1 else np.zeros(0)
+    cumulative = np.concatenate([[0], np.cumsum([tokens for _, tokens in segments])])
+    n = len(segments)
+    chunks = []
+    start = 0
+    while start < n:
+        remaining = cumulative[n] - cumulative[start]
+        if not final and remaining < 2 * max_tokens:
+            # Leave the tail for the next window, where its best cut point can be seen
+            break
+        if final and remaining <= max_tokens:
+            end = n
+        else:
+            # Cut after segment end - 1; keep the chunk within [min_tokens, max_tokens]
+            lowest = int(np.searchsorted(cumulative, cumulative[start] + min_tokens, side='left'))
+            highest = int(np.searchsorted(cumulative, cumulative[start] + max_tokens, side='right')) - 1
+            if final:
+                # Do not strand a tail smaller than min_tokens at the end of the document
+                highest = min(highest, int(np.searchsorted(cumulative, cumulative[n] - min_tokens, side='right')) - 1)
+            lowest = max(lowest, start + 1)
+            highest = min(highest, n - 1)
+            if lowest <= highest:
+                end = lowest + int(np.argmin(similarities[lowest - 1:highest]))
+            else:
+                end = max(start + 1, min(n, int(np.searchsorted(cumulative, cumulative[start] + max_tokens, side='right')) - 1))
+        chunks.append(' '.join(text for text, _ in segments[start:end]))
+        start = end
+    return chunks, start
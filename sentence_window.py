@@ -0,0 +1,130 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from vector_store import NumpyVectorStore
+
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])([\"')\]]*)\s+|\n{2,}")
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text into sentence spans.
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) character offsets of each non-empty sentence
+    """
+    spans = []
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        # Keep closing quotes and brackets with the sentence they end
+        end = match.start() + len(match.group(1) or "")
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = match.end()
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+class SentenceWindowIndex:
+    """
+    Sentence-level vector index that points back to parent chunks.
+    Searches match single sentences, and results are widened to a window of
+    neighbouring sentences from the parent chunk.
+    """
+
+    SPANS_FILE = "sentence_spans.json"
+
+    def __init__(self, embeddings: Embeddings, persist_directory: str):
+        self.persist_directory = persist_directory
+        self.store = NumpyVectorStore(embedding_function=embeddings, persist_directory=persist_directory)
+        self.chunks = {}  # chunk_id -> {"content", "source", "section", "spans"}
+        spans_path = os.path.join(persist_directory, self.SPANS_FILE)
+        if os.path.exists(spans_path):
+            with open(spans_path, 'r') as f:
+                self.chunks = json.load(f)
+
+    def __len__(self):
+        return len(self.store)
+
+    def add_chunks(self, chunks: List[Dict]) -> None:
+        """
+        Index every sentence of the given chunks.
+
+        Args:
+            chunks (List[Dict]): Dictionaries with "content", "source", "chunk_id" and "section" keys
+        """
+        texts = []
+        metadatas = []
+        for chunk in chunks:
+            spans = split_sentences(chunk["content"])
+            self.chunks[chunk["chunk_id"]] = {
+                "content": chunk["content"],
+                "source": chunk["source"],
+                "section": chunk.get("section"),
+                "spans": spans
+            }
+            for sentence_index, (start, end) in enumerate(spans):
+                texts.append(chunk["content"][start:end])
+                metadatas.append({"chunk_id": chunk["chunk_id"], "sentence_index": sentence_index,
+                                  "section": chunk.get("section")})
+        self.store.add_texts(texts, metadatas)
+
+    def remove_chunks(self, chunk_ids: List[str]) -> None:
+        """Remove the sentences of the given chunks."""
+        removed = set(chunk_ids)
+        for chunk_id in removed:
+            self.chunks.pop(chunk_id, None)
+        self.store.delete([vector_id for vector_id, metadata in zip(self.store.ids, self.store.metadatas)
+                           if metadata["chunk_id"] in removed])
+
+    def persist(self) -> None:
+        os.makedirs(self.persist_directory, exist_ok=True)
+        self.store.persist()
+        with open(os.path.join(self.persist_directory, self.SPANS_FILE), 'w') as f:
+            json.dump(self.chunks, f)
+
+    def search(self, query_embedding: List[float], k: int = 1, window: int = 2, filter: Optional[Dict] = None) -> List[Dict]:
+        """
+        Find the best-matching sentences and return windows around them.
+        Overlapping windows from the same chunk are only returned once.
+
+        Args:
+            query_embedding (List[float]): Embedded query
+            k (int): Number of windows to return
+            window (int): Number of sentences to include on each side of the match
+            filter (Dict, optional): Only match sentences whose metadata equals these values, e.g. {"section": ...}
+
+        Returns:
+            List[Dict]: Windows with content, source, chunk_id, start/end offsets into
+                the parent chunk and the matched sentence's cosine distance
+        """
+        results = []
+        covered = {}  # chunk_id -> list of (first, last) sentence ranges already returned
+        for doc, score in self.store.similarity_search_by_vector_with_relevance_scores(query_embedding, k=k * 4,
+                                                                                       filter=filter):
+            chunk_id = doc.metadata["chunk_id"]
+            chunk = self.chunks[chunk_id]
+            sentence_index = doc.metadata["sentence_index"]
+            first = max(0, sentence_index - window)
+            last = min(len(chunk["spans"]) - 1, sentence_index + window)
+            if any(first <= other_last and other_first <= last for other_first, other_last in covered.get(chunk_id, [])):
+                continue
+            covered.setdefault(chunk_id, []).append((first, last))
+
+            start = chunk["spans"][first][0]
+            end = chunk["spans"][last][1]
+            results.append({
+                "content": chunk["content"][start:end],
+                "source": chunk["source"],
+                "chunk_id": chunk_id,
+                "start": start,
+                "end": end,
+                "score": score
+            })
+            if len(results) == k:
+                break
+        return results
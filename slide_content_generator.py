@@ -1,11 +1,18 @@
 from typing import List, Optional, Tuple, Union
 import json
-from pydantic import BaseModel
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, ValidationError
 from openai import OpenAI
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 from pptx.enum.shapes import PP_PLACEHOLDER
 from pptx.enum.shapes import PP_PLACEHOLDER_TYPE
+from lexical_index import BM25Index
+from outline_generator import DocumentOutline, generate_outline
+from incremental_build import content_hash
+from llm_json import JSONListStream, resolve_model_response
+from model_routing import router
 
 class ContentMapping(BaseModel):
     content_type: str
@@ -31,7 +38,35 @@ class PresentationResponse(BaseModel):
     metadata: PresentationMetadata
     slides: List[Slide]
 
-def generate_slide_content(presentation_data, minimum_slides=10) -> Tuple[List[Slide]]:
+class SectionSlides(BaseModel):
+    slides: List[Slide]
+
+class LayoutMapping(BaseModel):
+    slide_number: Optional[int] = None
+    layout_id: int
+    layout_name: str = ""
+    mapping: List[ContentMapping]
+
+def generate_slide_content(presentation_data, minimum_slides=10, on_slide=None, metrics=None) -> Tuple[List[Slide]]:
+    """
+    Generate the whole deck in one call. The response is streamed and each slide
+    is validated as soon as its JSON object closes, so on_slide can start the
+    downstream work (image sizing, layout mapping) for slide N while slide N+1
+    is still being generated.
+
+    Args:
+        presentation_data (list): Per-chunk summary data, as built in main.py
+        minimum_slides (int): Minimum number of slides to ask for
+        on_slide (callable, optional): Called with each final Slide as soon as it is available.
+            Slides that had to be fixed or were cut off arrive after the stream ends
+        metrics (dict, optional): Receives time_to_first_slide and generation_time in seconds
+
+    Returns:
+        tuple: (slides, metadata)
+
+    Raises:
+        RuntimeError: If no routed model returns a response that validates
+    """
     client = OpenAI()
     prompt = f"""
     Strict Instructions:
@@ -67,32 +102,269 @@ def generate_slide_content(presentation_data, minimum_slides=10) -> Tuple[List[S
     }}
     {json.dumps(presentation_data, indent=2)}
 """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a presentation expert who creates detailed, informative section content in JSON format with specific examples and thorough analysis."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        max_tokens=4000
-    )
+    messages = [
+        {"role": "system", "content": "You are a presentation expert who creates detailed, informative section content in JSON format with specific examples and thorough analysis."},
+        {"role": "user", "content": prompt}
+    ]
+    model, *fallback_models = router.models("slides")
+    usage = []
+    stream = JSONListStream(client, messages, "slides", model=model, temperature=0.7, max_tokens=4000, usage=usage)
+    delivered = set()
+    stream_start = time.perf_counter()
+    for item in stream:
+        if not isinstance(item, dict):
+            continue
+        try:
+            slide = Slide(**item)
+        except ValidationError:
+            continue  # re-requested once the stream ends
+        key = slide.model_dump_json()
+        if on_slide is not None and key not in delivered:
+            on_slide(slide)
+        delivered.add(key)
+    if stream.time_to_first_item is not None:
+        print(f"First slide after {stream.time_to_first_item:.1f}s, all slides after {stream.elapsed:.1f}s")
+    if metrics is not None:
+        metrics["time_to_first_slide"] = stream.time_to_first_item
+        metrics["generation_time"] = stream.elapsed
     try:
-        content = response.choices[0].message.content.strip()
-        content = content.replace('```json', '').replace('```', '').rstrip(',')
-        raw_content = json.loads(content)
+        # Repairs the JSON and re-requests only invalid or missing slides instead of failing the whole deck
+        response = resolve_model_response(client, messages, PresentationResponse, stream.content, stream.truncated,
+                                          model=model, temperature=0.7, max_tokens=4000, usage=usage)
+        router.record("slides", model, time.perf_counter() - stream_start, usage)
+    except ValidationError as e:
+        router.record("slides", model, time.perf_counter() - stream_start, usage, ok=False)
+        if not fallback_models:
+            raise RuntimeError(f"Slide content validation failed:\n{e}") from e
+        print(f"slides: {model} output failed validation, falling back to the next model")
+        try:
+            response = router.request("slides", client, messages, PresentationResponse, models=fallback_models,
+                                      temperature=0.7, max_tokens=4000)
+        except ValidationError as e:
+            raise RuntimeError(f"Slide content validation failed:\n{e}") from e
+    if on_slide is not None:
+        for slide in response.slides:
+            if slide.model_dump_json() not in delivered:
+                on_slide(slide)
+    return response.slides, response.metadata
+
+def assign_summaries_to_sections(outline, presentation_data, per_section=3):
+    """
+    Decide which chunk summaries each outline section draws on. Uses the
+    section's source_summaries from the outline when the model gave them,
+    otherwise the best BM25 matches for the section heading and key points.
+    
+    Args:
+        outline (DocumentOutline): Outline from generate_outline
+        presentation_data (list): Per-chunk summary data, as built in main.py
+        per_section (int): Number of summaries to use when falling back to BM25
         
-        # Validate metadata and slides using Pydantic
-        slides = [Slide(**slide) for slide in raw_content["slides"]]
-        metadata = PresentationMetadata(**raw_content["metadata"])
-        return slides, metadata
+    Returns:
+        list: For each section, the indices of its summaries in presentation_data
+    """
+    index = BM25Index()
+    index.add_documents([
+        {"content": item["detailed_summary"], "source": "presentation_data", "chunk_id": str(i)}
+        for i, item in enumerate(presentation_data)
+    ])
+    assignments = []
+    for section in outline.sections:
+        indices = sorted({number - 1 for number in section.source_summaries if 1 <= number <= len(presentation_data)})
+        if not indices:
+            query = " ".join([section.heading] + [point for slide in section.slide_distribution for point in slide.key_points])
+            indices = sorted(int(doc["chunk_id"]) for doc, _ in index.search(query, k=per_section))
+        assignments.append(indices)
+    return assignments
+
+def generate_section_slides(deck_title, section, section_data, client=None) -> List[Slide]:
+    """
+    Generate the slides of one outline section from only that section's summaries,
+    retrieved content and images.
+    
+    Args:
+        deck_title (str): Title of the whole presentation, for context
+        section (SectionOutline): The section to write
+        section_data (list): presentation_data entries assigned to this section
+        client (OpenAI, optional): Client to reuse across threads
+        
+    Returns:
+        List[Slide]: The section's slides, numbered from 1 within the section
+    """
+    client = client or OpenAI()
+    planned_slides = [slide.model_dump() for slide in section.slide_distribution]
+    prompt = f"""
+    You are writing one section of the presentation "{deck_title}".
+
+    Section heading: {section.heading}
+    Number of slides in this section: {section.num_content_slides}
+    Planned slides (follow this plan, one slide per entry): {json.dumps(planned_slides, indent=2)}
+
+    Strict Instructions:
+    Use the information in the `detailed_summary` and the `response` in the `retrieved_content_from_document` below to create informative and clear bullet points for each slide. Each bullet point should be detailed in itself.
+    Ensure there are a maximum of 3 bullets per slide.
+    Map the key visualizations to appropriate slides using the provided image paths. No slide should have more than 1 image. Ensure the image paths are taken from the `retrived_image_paths_charts` and `retrived_image_paths_images`. Do not make up any image paths. Do not add anything to the image paths.
+    Return a JSON object with the following structure:
+    {{
+        "slides": [
+            {{
+                "slide": number,
+                "slide_title": "Title of the slide",
+                "slide_content": {{
+                    "bullets": ["bullet point 1", "bullet point 2"],
+                    "speaker_notes": "Detailed speaker notes for this slide",
+                    "image_paths": ["path_to_image1.png"]
+                }}
+            }}
+        ]
+    }}
+    {json.dumps(section_data, indent=2)}
+"""
+    messages = [
+        {"role": "system", "content": "You are a presentation expert who creates detailed, informative section content in JSON format with specific examples and thorough analysis."},
+        {"role": "user", "content": prompt}
+    ]
+    return router.request("section_slides", client, messages, SectionSlides, temperature=0.7, max_tokens=2000).slides
+
+def _outline_slides(section) -> List[Slide]:
+    """Slides built directly from the outline, used when a section's generation fails."""
+    return [
+        Slide(
+            slide=planned.sub_slide,
+            slide_title=planned.sub_slide_title or section.heading,
+            slide_content=SlideContent(bullets=planned.key_points, speaker_notes="")
+        ) for planned in section.slide_distribution
+    ]
+
+def _reuse_outline(previous, presentation_data, summary_hashes, max_changed_fraction):
+    """
+    Carry the previous run's outline over to the current summaries, or return None
+    if too many summaries changed for it to still fit.
+    Each section keeps the summaries it had that are unchanged; new summaries are
+    attached to the section whose heading and key points match them best.
+    """
+    previous_hashes = previous["summary_hashes"]
+    unchanged = set(previous_hashes) & set(summary_hashes)
+    if not summary_hashes or 1 - len(unchanged) / len(summary_hashes) > max_changed_fraction:
+        return None
+    outline = DocumentOutline.model_validate(previous["outline"])
+    new_index = {summary_hash: i for i, summary_hash in enumerate(summary_hashes)}
+    for section in outline.sections:
+        section.source_summaries = sorted(
+            new_index[previous_hashes[number - 1]] + 1 for number in section.source_summaries
+            if 1 <= number <= len(previous_hashes) and previous_hashes[number - 1] in new_index
+        )
+    section_index = BM25Index()
+    section_index.add_documents([
+        {"content": " ".join([section.heading] + [point for slide in section.slide_distribution for point in slide.key_points]),
+         "source": "outline", "chunk_id": str(i)}
+        for i, section in enumerate(outline.sections)
+    ])
+    for i, summary_hash in enumerate(summary_hashes):
+        if summary_hash in unchanged:
+            continue
+        matches = section_index.search(presentation_data[i]["detailed_summary"], k=1)
+        if matches:
+            outline.sections[int(matches[0][0]["chunk_id"])].source_summaries.append(i + 1)
+    return outline
+
+def generate_slide_content_by_section(presentation_data, title, max_slides=15, max_workers=8, build_state=None,
+                                      max_changed_fraction=0.5, on_slide=None, metrics=None) -> Tuple[List[Slide], PresentationMetadata]:
+    """
+    Two-phase (map-reduce) alternative to generate_slide_content. First an outline
+    is built from the chunk summaries with generate_outline; then every section's
+    slides are generated concurrently from just that section's summaries and
+    retrieved content, and the results are stitched together in outline order.
+    Latency is bounded by the slowest section instead of the whole deck.
+    
+    Args:
+        presentation_data (list): Per-chunk summary data, as built in main.py
+        title (str): Working title of the document
+        max_slides (int): Maximum number of content slides in the outline
+        max_workers (int): Maximum number of sections generated at once
+        build_state (BuildState, optional): Results of the previous run. The previous outline
+            is reused while at most max_changed_fraction of the summaries changed, and only
+            sections whose outline entry or input summaries changed are regenerated
+        max_changed_fraction (float): Share of changed summaries above which the outline is rebuilt
+        on_slide (callable, optional): Called with each final Slide as soon as its section and all
+            earlier sections are done, so downstream work overlaps the remaining sections
+        metrics (dict, optional): Receives time_to_first_slide and generation_time in seconds
         
-    except json.JSONDecodeError as e:
-        print(f"Error: Could not parse response as JSON. Error details: {str(e)}")
-        print("Raw response content:", response.choices[0].message.content)
-        return None, None
-    except Exception as e:
-        print(f"Error: Could not validate content. Error details: {str(e)}")
-        return None, None
+    Returns:
+        tuple: (slides, metadata)
+    """
+    start = time.perf_counter()
+    summary_hashes = [content_hash(item) for item in presentation_data]
+    outline = None
+    if build_state is not None:
+        previous = build_state.get_latest("outline")
+        if previous and previous["title"] == title and previous["max_slides"] == max_slides:
+            outline = _reuse_outline(previous, presentation_data, summary_hashes, max_changed_fraction)
+    if outline is not None:
+        print("Reusing the previous outline")
+    else:
+        outline = generate_outline(title, [item["detailed_summary"] for item in presentation_data], max_slides=max_slides)
+    outline_time = time.perf_counter() - start
+    print(f"Outline: {len(outline.sections)} sections, {sum(s.num_content_slides for s in outline.sections)} slides ({outline_time:.1f}s)")
+
+    assignments = assign_summaries_to_sections(outline, presentation_data)
+    if build_state is not None:
+        # Record the summaries each section used, so the next run can tell which sections an edit touches
+        for section, indices in zip(outline.sections, assignments):
+            section.source_summaries = [i + 1 for i in indices]
+        build_state.put_latest("outline", {
+            "title": title,
+            "max_slides": max_slides,
+            "outline": outline.model_dump(),
+            "summary_hashes": summary_hashes
+        })
+    client = OpenAI()
+
+    def run_section(section_index):
+        section = outline.sections[section_index]
+        section_data = [presentation_data[i] for i in assignments[section_index]]
+        section_start = time.perf_counter()
+        key = content_hash(outline.title, section.heading, [slide.model_dump() for slide in section.slide_distribution], section_data)
+        if build_state is not None:
+            cached = build_state.get("sections", key, label=section.heading)
+            if cached is not None:
+                return [Slide(**slide) for slide in cached], 0.0
+        try:
+            slides = generate_section_slides(outline.title, section, section_data, client)
+            if build_state is not None:
+                build_state.put("sections", key, [slide.model_dump() for slide in slides])
+        except Exception as e:
+            print(f"Error: Could not generate section '{section.heading}', using the outline instead. Error details: {str(e)}")
+            slides = _outline_slides(section)
+        return slides, time.perf_counter() - section_start
+
+    # Stitch sections in outline order as they finish, renumber slides and keep each image on one slide only
+    slides = []
+    used_images = set()
+    section_times = []
+    time_to_first_slide = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_section, i) for i in range(len(outline.sections))]
+        for future in futures:
+            section_slides, elapsed = future.result()
+            section_times.append(elapsed)
+            for slide in section_slides:
+                slide.slide = len(slides) + 1
+                slide.slide_content.image_paths = [path for path in slide.slide_content.image_paths if path not in used_images]
+                used_images.update(slide.slide_content.image_paths)
+                slides.append(slide)
+                if time_to_first_slide is None:
+                    time_to_first_slide = time.perf_counter() - start
+                if on_slide is not None:
+                    on_slide(slide)
+    metadata = PresentationMetadata(title=outline.title, subtitle=outline.subtitle or "")
+
+    total_time = time.perf_counter() - start
+    print(f"Generated {len(slides)} slides: outline {outline_time:.1f}s, slowest section {max(section_times, default=0):.1f}s, "
+          f"first slide {time_to_first_slide or 0:.1f}s, total {total_time:.1f}s")
+    if metrics is not None:
+        metrics["time_to_first_slide"] = time_to_first_slide
+        metrics["generation_time"] = total_time
+    return slides, metadata
 
 # def generate_slide_content2(presentation_data, layout_specs) -> Tuple[List[Slide], PresentationMetadata]:
 #     client = OpenAI()
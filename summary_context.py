@@ -0,0 +1,114 @@
+import re
+from collections import Counter
+from typing import List
+from fact_index import MONTHS, STOPWORDS, extract_facts
+from text_chunker import SENTENCE_BOUNDARY, get_token_counter
+
+CONTEXT_MODES = ("full", "summary", "entities", "none")
+# Capitalized words and multi-word names, e.g. "Airbnb", "Brian Chesky", "Y Combinator"
+ENTITY_PATTERN = re.compile(r"\b[A-Z][\w&'-]*(?:\s+(?:of\s+|&\s+)?[A-Z][\w&'-]*)*")
+MONTH_PATTERN = re.compile(MONTHS + r"$")
+
+class RollingContext:
+    """
+    Context carried from one summarize_text call to the next.
+
+    Modes:
+        "full": the entire previous chunk (the original behaviour)
+        "summary": the previous chunk's detailed summary, capped at max_tokens
+        "entities": a running digest of the most prominent names and figures seen so far,
+            weighted towards recent chunks and capped at max_tokens
+        "none": no context
+    """
+
+    def __init__(self, mode: str = "summary", max_tokens: int = 300, decay: float = 0.5, count_tokens=None):
+        if mode not in CONTEXT_MODES:
+            raise ValueError(f"Unknown context mode: {mode} (expected one of {', '.join(CONTEXT_MODES)})")
+        self.mode = mode
+        self.max_tokens = max_tokens
+        self.decay = decay
+        self.count_tokens = count_tokens or get_token_counter()
+        self.clear()
+
+    def clear(self) -> None:
+        self.previous_chunk = None
+        self.previous_summary = None
+        self.entity_scores = Counter()
+        self.figures: List[str] = []
+
+    def update(self, chunk: str, summary: str) -> None:
+        """
+        Fold a summarized chunk into the context.
+
+        Args:
+            chunk (str): The chunk that was just summarized
+            summary (str): Its detailed summary
+        """
+        if self.mode == "full":
+            self.previous_chunk = chunk
+        elif self.mode == "summary":
+            self.previous_summary = summary
+        elif self.mode == "entities":
+            # Decay older mentions and forget entities that have faded out
+            self.entity_scores = Counter({entity: score * self.decay for entity, score in self.entity_scores.items()
+                                          if score * self.decay >= 0.05})
+            for match in ENTITY_PATTERN.finditer(chunk):
+                entity = match.group().strip()
+                if entity.lower() not in STOPWORDS and len(entity) > 1 and not MONTH_PATTERN.match(entity):
+                    self.entity_scores[entity] += 1
+            # Newest figures first; keep the sentence fragment that says what each number is
+            figures = [f"{fact['raw']} ({' '.join(fact['context'].split())})" for fact in extract_facts(chunk, context_chars=40)
+                       if fact['kind'] != 'number']
+            self.figures = figures + self.figures
+
+    def render(self) -> str:
+        """
+        The context text for the next prompt, or "" if there is none yet.
+
+        Returns:
+            str: Labelled context block
+        """
+        if self.mode == "full" and self.previous_chunk:
+            return f"Previous content chunk for context:\n{self.previous_chunk}\n\n"
+        if self.mode == "summary" and self.previous_summary:
+            return f"Summary of the previous content for context:\n{self._truncate(self.previous_summary)}\n\n"
+        if self.mode == "entities" and (self.entity_scores or self.figures):
+            return f"Key entities and figures from earlier content:\n{self._entity_digest()}\n\n"
+        return ""
+
+    def _truncate(self, text: str) -> str:
+        """Keep whole sentences from the start of text up to max_tokens."""
+        kept = []
+        used = 0
+        for sentence in SENTENCE_BOUNDARY.split(text):
+            tokens = self.count_tokens(sentence)
+            if used + tokens > self.max_tokens:
+                break
+            kept.append(sentence)
+            used += tokens
+        return " ".join(kept)
+
+    def _entity_digest(self) -> str:
+        """Entities by score, then figures by recency, until the token cap is reached."""
+        lines = []
+        used = 0
+        entities = [entity for entity, _ in self.entity_scores.most_common(40)]
+        while entities:
+            line = "Entities: " + ", ".join(entities)
+            if self.count_tokens(line) <= self.max_tokens // 2:
+                lines.append(line)
+                used += self.count_tokens(line)
+                break
+            entities = entities[:len(entities) * 3 // 4]
+        rendered = 0
+        for figure in self.figures:
+            line = f"- {figure}"
+            tokens = self.count_tokens(line)
+            if used + tokens > self.max_tokens:
+                break
+            lines.append(line)
+            used += tokens
+            rendered += 1
+        # Older figures beyond the cap will never be rendered again
+        self.figures = self.figures[:rendered]
+        return "\n".join(lines)
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+import pytest
+from incremental_build import BuildState, summarize_chunks
+from summary_context import RollingContext
+
+class FakeSummarizer:
+    """Stands in for PresentationSummarizer: records which chunks it was asked to summarize."""
+
+    def __init__(self, context_mode):
+        self.context = RollingContext(mode=context_mode, count_tokens=lambda text: len(text.split()))
+        self.summarized = []
+
+    def models(self):
+        return ["test-model"]
+
+    def summarize_text(self, text, previous_chunk=None):
+        self.summarized.append(text)
+        summary = SimpleNamespace(detailed_summary=f"Summary of {text}", model_dump=lambda: {"detailed_summary": f"Summary of {text}"})
+        self.context.update(text, summary.detailed_summary)
+        return summary
+
+def run(chunks, context_mode, path):
+    summarizer = FakeSummarizer(context_mode)
+    build_state = BuildState(str(path))
+    summarize_chunks(summarizer, chunks, build_state, load=lambda cached: SimpleNamespace(**cached))
+    build_state.save()
+    return summarizer.summarized
+
+@pytest.mark.parametrize("context_mode, expected", [
+    ("summary", ["chunk 2 edited"]),
+    ("entities", ["chunk 2 edited"]),
+    ("none", ["chunk 2 edited"]),
+    ("full", ["chunk 2 edited", "chunk 3"]),
+])
+def test_editing_a_chunk_only_resummarizes_that_chunk(tmp_path, context_mode, expected):
+    path = tmp_path / "build_state.json"
+    chunks = [f"chunk {i}" for i in range(5)]
+    assert run(chunks, context_mode, path) == chunks
+
+    chunks[2] = "chunk 2 edited"
+    assert run(chunks, context_mode, path) == expected
+
+def test_unchanged_chunks_are_all_reused(tmp_path):
+    path = tmp_path / "build_state.json"
+    chunks = [f"chunk {i}" for i in range(3)]
+    run(chunks, "summary", path)
+    assert run(chunks, "summary", path) == []
@@ -0,0 +1,46 @@
+import random
+import pytest
+from text_chunker import estimate_tokens, iter_token_chunks
+
+WORDS = ("revenue growth market host guest listing booking city travel platform "
+         "investment founder community design review trust payment season").split()
+
+def item_words(text_items):
+    """All whitespace-separated words of the input, in order, with tables flattened as the chunkers do."""
+    for item in text_items:
+        if isinstance(item, list):
+            item = '\n'.join(' | '.join(str(cell) for cell in row) for row in item)
+        yield from item.split()
+
+def make_random_items(rng):
+    """Adversarial mix: empty and tiny items, huge paragraphs, run-on sentences, long tables."""
+    items = []
+    for _ in range(rng.randint(1, 40)):
+        kind = rng.random()
+        if kind < 0.2:
+            items.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 5))))
+        elif kind < 0.5:
+            sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40))) + rng.choice(".!?") for _ in range(rng.randint(1, 80))]
+            items.append(" ".join(sentences))
+        elif kind < 0.7:
+            items.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(500, 3000))))
+        else:
+            items.append([[str(rng.randint(0, 10 ** 6)) for _ in range(rng.randint(1, 6))] for _ in range(rng.randint(1, 300))])
+    return items
+
+@pytest.fixture(params=range(0, 300, 10))
+def chunked(request):
+    """Ten random documents per seed, with their token chunks."""
+    rng = random.Random(request.param)
+    documents = [make_random_items(rng) for _ in range(10)]
+    return [(items, list(iter_token_chunks(items, max_tokens=400, min_tokens=80, count_tokens=estimate_tokens)))
+            for items in documents]
+
+def test_no_text_is_dropped_or_reordered(chunked):
+    for items, chunks in chunked:
+        assert [word for chunk in chunks for word in chunk.split()] == list(item_words(items))
+
+def test_chunks_fit_the_token_budget(chunked):
+    for _, chunks in chunked:
+        # Joining adds one space per segment, so allow one token of slack per 3-character-or-shorter join
+        assert all(estimate_tokens(chunk) <= 400 * 1.05 for chunk in chunks)
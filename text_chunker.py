@@ -1,21 +1,50 @@
+import re
+from document_model import ParsedDocument
+
 def chunk_text(text_list, min_chunk_size=1000, max_chunk_size=6000):
     """
     Chunk text into meaningful sections based on size and content.
     Handles both text strings and nested table data.
     
     Args:
-        text_list (list): List of text strings and table data to chunk
+        text_list (list or ParsedDocument): List of text strings and table data to chunk,
+            or a parsed document to chunk directly
         min_chunk_size (int): Minimum size of each chunk
         max_chunk_size (int): Maximum size of each chunk
         
     Returns:
         list: List of text chunks
     """
-    chunks = []
+    return list(iter_chunks(text_list, min_chunk_size=min_chunk_size, max_chunk_size=max_chunk_size))
+
+def iter_chunks(text_items, min_chunk_size=1000, max_chunk_size=6000):
+    """
+    Generator version of chunk_text: consumes text items one at a time and
+    yields each chunk as soon as it is complete, so memory stays bounded by
+    the chunk size rather than the document size.
+    
+    Args:
+        text_items (iterable or ParsedDocument): Text strings and table data, e.g. from
+            iter_text_and_tables, or a parsed document to chunk directly
+        min_chunk_size (int): Minimum size of each chunk
+        max_chunk_size (int): Maximum size of each chunk
+        
+    Yields:
+        str: Text chunks
+    """
+    if isinstance(text_items, ParsedDocument):
+        text_items = text_items.iter_text_and_tables()
+    for chunk in _iter_sized_chunks(text_items, max_chunk_size):
+        # Filter out chunks that are too small
+        if len(chunk) >= min_chunk_size:
+            yield chunk
+
+def _iter_sized_chunks(text_items, max_chunk_size):
+    """Yield chunks of at most max_chunk_size characters, before any minimum-size filtering."""
     current_chunk = []
     current_size = 0
     
-    for text_item in text_list:
+    for text_item in text_items:
         # Handle table data (nested lists)
         if isinstance(text_item, list):
             # Convert table rows to text
@@ -33,7 +62,7 @@ def chunk_text(text_list, min_chunk_size=1000, max_chunk_size=6000):
             for sentence in sentences:
                 if current_size + len(sentence) > max_chunk_size:
                     if current_chunk:
-                        chunks.append(' '.join(current_chunk))
+                        yield ' '.join(current_chunk)
                         current_chunk = []
                         current_size = 0
                     if len(sentence) > max_chunk_size:
@@ -47,20 +76,20 @@ def chunk_text(text_list, min_chunk_size=1000, max_chunk_size=6000):
                                 temp_size += len(word) + 1
                             else:
                                 if temp_chunk:
-                                    chunks.append(' '.join(temp_chunk))
+                                    yield ' '.join(temp_chunk)
                                 temp_chunk = [word]
                                 temp_size = len(word)
                         if temp_chunk:
-                            chunks.append(' '.join(temp_chunk))
+                            yield ' '.join(temp_chunk)
                     else:
-                        chunks.append(sentence)
+                        yield sentence
                 else:
                     current_chunk.append(sentence)
                     current_size += len(sentence) + 1
         else:
             if current_size + len(text_item) > max_chunk_size:
                 if current_chunk:
-                    chunks.append(' '.join(current_chunk))
+                    yield ' '.join(current_chunk)
                 current_chunk = [text_item]
                 current_size = len(text_item)
             else:
@@ -69,9 +98,168 @@ def chunk_text(text_list, min_chunk_size=1000, max_chunk_size=6000):
     
     # Add any remaining text
     if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    
-    # Filter out chunks that are too small
-    chunks = [chunk for chunk in chunks if len(chunk) >= min_chunk_size]
-    
-    return chunks
+        yield ' '.join(current_chunk)
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) for when tiktoken is unavailable."""
+    return (len(text) + 3) // 4
+
+def get_token_counter(model="gpt-3.5-turbo"):
+    """
+    Return a function that counts model tokens in a string.
+
+    Args:
+        model (str): Model whose tokenizer should be used
+
+    Returns:
+        callable: str -> int token count (tiktoken if installed, otherwise estimate_tokens)
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        print("tiktoken not installed, estimating tokens as characters / 4")
+        return estimate_tokens
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+def iter_token_chunks(text_items, max_tokens=1200, min_tokens=250, count_tokens=None):
+    """
+    Chunk text items to a model-token budget without dropping any text.
+
+    Items that fit the budget are kept whole; larger text items are split at
+    sentence boundaries (and over-long sentences at word boundaries), larger
+    tables into blocks of rows. Segments are packed greedily into chunks of at
+    most max_tokens. A chunk that ends up under min_tokens is merged into the
+    previous chunk, or topped up with the previous chunk's trailing segments,
+    instead of being discarded. Each segment is tokenized once and each chunk
+    joined once, so the cost is linear in the input.
+
+    Args:
+        text_items (iterable or ParsedDocument): Text strings and table data, e.g. from
+            iter_text_and_tables, or a parsed document to chunk directly
+        max_tokens (int): Token budget for one chunk in the prompt
+        min_tokens (int): Chunks smaller than this are merged with a neighbour where the budget allows
+        count_tokens (callable, optional): str -> int token counter (defaults to get_token_counter())
+
+    Yields:
+        str: Text chunks
+    """
+    if isinstance(text_items, ParsedDocument):
+        text_items = text_items.iter_text_and_tables()
+    if count_tokens is None:
+        count_tokens = get_token_counter()
+
+    # The last complete chunk is held back so a small successor can be merged into it
+    held, held_tokens = None, 0
+    for parts, tokens in _iter_packed(_iter_segments(text_items, max_tokens, count_tokens), max_tokens):
+        if held is not None and (tokens < min_tokens or held_tokens < min_tokens):
+            if held_tokens + tokens <= max_tokens:
+                held.extend(parts)
+                held_tokens += tokens
+                continue
+            # Too big to merge: shift segments across the boundary until both sides reach min_tokens
+            if tokens < min_tokens:
+                moved = []
+                while held and tokens < min_tokens and held_tokens - held[-1][1] >= min_tokens and tokens + held[-1][1] <= max_tokens:
+                    segment = held.pop()
+                    held_tokens -= segment[1]
+                    tokens += segment[1]
+                    moved.append(segment)
+                parts = moved[::-1] + parts
+            else:
+                start = 0
+                while start < len(parts) and held_tokens < min_tokens and tokens - parts[start][1] >= min_tokens and held_tokens + parts[start][1] <= max_tokens:
+                    held.append(parts[start])
+                    held_tokens += parts[start][1]
+                    tokens -= parts[start][1]
+                    start += 1
+                parts = parts[start:]
+        if held:
+            yield ' '.join(text for text, _ in held)
+        held, held_tokens = parts, tokens
+    if held:
+        yield ' '.join(text for text, _ in held)
+
+def _iter_packed(segments, max_tokens):
+    """Greedily pack (text, tokens) segments into lists totalling at most max_tokens."""
+    parts = []
+    total = 0
+    for segment in segments:
+        if parts and total + segment[1] > max_tokens:
+            yield parts, total
+            parts, total = [], 0
+        parts.append(segment)
+        total += segment[1]
+    if parts:
+        yield parts, total
+
+def _iter_segments(text_items, max_tokens, count_tokens):
+    """Yield (text, tokens) segments no larger than max_tokens (except single over-long words)."""
+    for text_item in text_items:
+        if isinstance(text_item, list):
+            rows = [' | '.join(str(cell) for cell in row) if isinstance(row, list) else str(row) for row in text_item]
+            table_text = '\n'.join(rows)
+            tokens = count_tokens(table_text)
+            if tokens <= max_tokens:
+                yield table_text, tokens
+            else:
+                yield from _pack_pieces(rows, '\n', max_tokens, count_tokens)
+            continue
+
+        tokens = count_tokens(text_item)
+        if tokens <= max_tokens:
+            if text_item:
+                yield text_item, tokens
+            continue
+        for sentence in SENTENCE_BOUNDARY.split(text_item):
+            tokens = count_tokens(sentence)
+            if tokens <= max_tokens:
+                yield sentence, tokens
+            else:
+                yield from _pack_pieces(sentence.split(), ' ', max_tokens, count_tokens)
+
+def iter_sentence_segments(text_items, max_tokens, count_tokens):
+    """
+    Split text items into sentence-sized (text, tokens) segments. Tables stay
+    whole when they fit max_tokens and are split into blocks of rows otherwise;
+    over-long sentences are split at word boundaries.
+
+    Args:
+        text_items (iterable): Text strings and table data
+        max_tokens (int): Largest segment size in tokens
+        count_tokens (callable): str -> int token counter
+
+    Yields:
+        tuple: (segment text, token count)
+    """
+    for text_item in text_items:
+        if isinstance(text_item, list):
+            yield from _iter_segments([text_item], max_tokens, count_tokens)
+            continue
+        for sentence in SENTENCE_BOUNDARY.split(text_item.strip()):
+            if not sentence:
+                continue
+            tokens = count_tokens(sentence)
+            if tokens <= max_tokens:
+                yield sentence, tokens
+            else:
+                yield from _pack_pieces(sentence.split(), ' ', max_tokens, count_tokens)
+
+def _pack_pieces(pieces, separator, max_tokens, count_tokens):
+    """Join consecutive pieces (table rows or words) into segments of at most max_tokens."""
+    block = []
+    block_tokens = 0
+    for piece in pieces:
+        tokens = count_tokens(piece)
+        if block and block_tokens + tokens > max_tokens:
+            yield separator.join(block), block_tokens
+            block, block_tokens = [], 0
+        block.append(piece)
+        block_tokens += tokens
+    if block:
+        yield separator.join(block), block_tokens
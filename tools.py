@@ -5,6 +5,7 @@ import shutil
 from multimodal_rag import get_text_embedding, build_image_index
 import torch.nn.functional as F
 import json
+import time
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, END
 import torch
@@ -12,8 +13,10 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from llama_parse import LlamaParse
 from document_parser import rename_image_files
+from summary_context import RollingContext
+from model_routing import router
 import copy
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Dict
 
 client = OpenAI()
@@ -178,11 +181,22 @@ class PresentationIdeation(BaseModel):
     )
 
 class PresentationSummarizer:
-    def __init__(self, model="gpt-3.5-turbo"):
+    def __init__(self, model=None, context_mode="full", context_tokens=300):
+        """
+        Args:
+            model (str, optional): Chat model used for summarization; defaults to the
+                "summarize" route of model_routing.router, with its fallbacks
+            context_mode (str): Context carried between chunks: "full" (the previous chunk),
+                "summary" (the previous summary), "entities" (running digest of names and figures)
+                or "none"; see summary_context.RollingContext
+            context_tokens (int): Token cap for the "summary" and "entities" context
+        """
         self.client = OpenAI()
         self.model = model
         self.conversation_history = []
         self.previous_summaries = []
+        self.context = RollingContext(mode=context_mode, max_tokens=context_tokens)
+        self.usage_log = []  # prompt/completion tokens and latency of each summarize_text call
         self.system_prompt = """You are a professional presentation ideator creating a cohesive PowerPoint presentation. 
         You will be given chunks of text from a document. Your job is to ideate on the best way to present the information in a way that is engaging and easy to understand. 
 
@@ -220,7 +234,8 @@ class PresentationSummarizer:
         
         Args:
             text (str): The text content to summarize
-            previous_chunk (str, optional): The previous chunk of text for additional context
+            previous_chunk (str, optional): The previous chunk of text for additional context;
+                only used in "full" context mode, other modes use the rolling context
             
         Returns:
             PresentationIdeation: A structured ideation object containing detailed summary, visualizations, and additional information
@@ -231,10 +246,8 @@ class PresentationSummarizer:
             "content": self.system_prompt
         }]
 
-        # Add previous chunk context if available
-        chunk_context = ""
-        if previous_chunk:
-            chunk_context = f"Previous content chunk for context:\n{previous_chunk}\n\n"
+        # Add previous chunk context, or the rolling digest of earlier chunks, if available
+        chunk_context = self.prompt_context(previous_chunk)
 
         # Add the current text to conversation
         prompt = f"""
@@ -258,39 +271,38 @@ class PresentationSummarizer:
             "content": prompt
         })
 
-        # Get response from model
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.3,
-            max_tokens=2000,
-        )
-
-        # Parse and validate the response
-        summary = response.choices[0].message.content.strip()
+        # Get response from model; the JSON is repaired and only invalid fields are re-requested
+        start = time.perf_counter()
+        usage = []
         try:
-            # Extract JSON from the response if it's wrapped in markdown code blocks
-            if "```json" in summary:
-                summary = summary.split("```json")[1].split("```")[0].strip()
-            elif "```" in summary:
-                summary = summary.split("```")[1].strip()
-            
-            # Parse the JSON string into a dictionary
-            summary_dict = json.loads(summary)
-            
-            # Create PresentationIdeation object from dictionary
-            ideation = PresentationIdeation(
-                detailed_summary=summary_dict["detailed_summary"],
-                key_visualizations=summary_dict["key_visualizations"],
-                additional_information_needed=summary_dict["additional_information_needed"]
-            )
-            
-            # Store the summary for reference but don't add to conversation history
-            self.previous_summaries.append(summary)
-
-            return ideation
-        except Exception as e:
+            ideation = router.request("summarize", self.client, messages, PresentationIdeation,
+                                      models=self.models(),
+                                      temperature=0.3, max_tokens=2000, usage=usage)
+        except ValidationError as e:
             raise ValueError(f"Failed to parse model response as valid ideation: {str(e)}")
+        finally:
+            self.usage_log.append({
+                "context_mode": self.context.mode,
+                "prompt_tokens": sum(call["prompt_tokens"] or 0 for call in usage) if usage else None,
+                "completion_tokens": sum(call["completion_tokens"] or 0 for call in usage) if usage else None,
+                "latency": time.perf_counter() - start
+            })
+
+        # Store the summary for reference but don't add to conversation history
+        self.previous_summaries.append(ideation.model_dump_json())
+        self.context.update(text, ideation.detailed_summary)
+
+        return ideation
+
+    def prompt_context(self, previous_chunk=None):
+        """The context block summarize_text adds to the prompt for the next chunk."""
+        if self.context.mode == "full" and previous_chunk:
+            return f"Previous content chunk for context:\n{previous_chunk}\n\n"
+        return self.context.render()
+
+    def models(self):
+        """Models summarize_text tries, in order: the explicit model, or the "summarize" route."""
+        return [self.model] if self.model else router.models("summarize")
 
     def clear_history(self):
         """Clear the conversation history while maintaining the system prompt."""
@@ -299,6 +311,7 @@ class PresentationSummarizer:
             "content": self.system_prompt
         }]
         self.previous_summaries = []
+        self.context.clear()
 
 def get_best_image(text_query, image_index):
     
@@ -415,43 +428,49 @@ def get_best_image(text_query, image_index):
     
 #     return updated_content
 
-def update_image_dimensions(slide_content):
+def update_image_dimensions(slide_content, catalog=None, save_path='slide_content.json'):
     """
     Updates the image dimensions for each slide in the slide content.
+    Dimensions come from the image catalog recorded at extraction/download time;
+    only images missing from the catalog are opened with PIL.
     
     Args:
         slide_content (list): List of slides containing image paths
+        catalog (ImageCatalog, optional): Image catalog (defaults to the project catalog)
+        save_path (str, optional): File the updated slide content is written to; None to skip writing
         
     Returns:
         list: Updated slide content with image dimensions
     """
     import os
     from PIL import Image
+    from image_catalog import ImageCatalog
+
+    if catalog is None:
+        catalog = ImageCatalog()
     
     for slide in slide_content:
         if 'slide_content' in slide and 'image_paths' in slide['slide_content']:
             image_dimensions = []
             for image_path in slide['slide_content']['image_paths']:
-                try:
-                    full_path = os.path.join('images', image_path)
-                    with Image.open(full_path) as img:
-                        width, height = img.size
-                        image_dimensions.append({
-                            'path': image_path,
-                            'width': width,
-                            'height': height
-                        })
-                except Exception as e:
-                    print(f"Error getting dimensions for {image_path}: {str(e)}")
-                    image_dimensions.append({
-                        'path': image_path,
-                        'width': None,
-                        'height': None
-                    })
+                width, height = catalog.dimensions(image_path)
+                if width is None or height is None:
+                    try:
+                        full_path = catalog.resolve_path(image_path) or os.path.join('images', image_path)
+                        with Image.open(full_path) as img:
+                            width, height = img.size
+                    except Exception as e:
+                        print(f"Error getting dimensions for {image_path}: {str(e)}")
+                image_dimensions.append({
+                    'path': image_path,
+                    'width': width,
+                    'height': height
+                })
             slide['slide_content']['image_dimensions'] = image_dimensions
     
     # Save updated slide_content back to file
-    with open('slide_content.json', 'w') as f:
-        json.dump(slide_content, f, indent=2)
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump(slide_content, f, indent=2)
         
     return slide_content
@@ -0,0 +1,187 @@
+import json
+import os
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+class NumpyVectorStore(VectorStore):
+    """
+    Embedded flat vector index: a row-normalized float32 matrix plus parallel
+    text/metadata arrays, searched exactly with a single matrix-vector product.
+
+    With a persist_directory the matrix is saved as a .npy file and reopened
+    memory-mapped, so startup does not read the vectors into memory.
+    """
+
+    MATRIX_FILE = "vectors.npy"
+    METADATA_FILE = "vectors_metadata.json"
+
+    def __init__(self, embedding_function: Embeddings, persist_directory: Optional[str] = None):
+        self.embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self._matrix = None  # capacity-sized buffer; only the first self._count rows are valid
+        self._count = 0
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+
+        if persist_directory and os.path.exists(os.path.join(persist_directory, self.MATRIX_FILE)):
+            self._matrix = np.load(os.path.join(persist_directory, self.MATRIX_FILE), mmap_mode='r')
+            self._count = self._matrix.shape[0]
+            with open(os.path.join(persist_directory, self.METADATA_FILE), 'r') as f:
+                data = json.load(f)
+            self.ids = data["ids"]
+            self.texts = data["texts"]
+            self.metadatas = data["metadatas"]
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The normalized embedding matrix, one row per stored text."""
+        if self._matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._matrix[:self._count]
+
+    def add_vectors(self, vectors, texts: List[str], metadatas: Optional[List[dict]] = None,
+                    ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Add precomputed embeddings with their texts.
+
+        Args:
+            vectors: Array-like of shape (n, dim)
+            texts (List[str]): Texts for each vector
+            metadatas (List[dict], optional): Metadata for each vector
+            ids (List[str], optional): Ids for each vector (generated if omitted)
+
+        Returns:
+            List[str]: Ids of the added vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+            raise ValueError("vectors must have one row per text")
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+        # Grow the buffer geometrically so repeated ingestion stays amortized linear
+        needed = self._count + len(texts)
+        if self._matrix is None or needed > self._matrix.shape[0] or not self._matrix.flags.writeable:
+            capacity = max(needed, 2 * (self._matrix.shape[0] if self._matrix is not None else 0), 1024)
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            if self._count:
+                grown[:self._count] = self._matrix[:self._count]
+            self._matrix = grown
+        self._matrix[self._count:needed] = vectors
+        self._count = needed
+
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas if metadatas is not None else [{} for _ in texts])
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = self.embedding_function.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """
+        Remove vectors by id, compacting the matrix.
+
+        Args:
+            ids (List[str], optional): Ids to remove
+
+        Returns:
+            bool: True if anything was removed
+        """
+        removed = set(ids or ())
+        keep = [i for i, vector_id in enumerate(self.ids) if vector_id not in removed]
+        if len(keep) == self._count:
+            return False
+        self._matrix = np.array(self.matrix[keep], dtype=np.float32).reshape(len(keep), -1) if keep else None
+        self._count = len(keep)
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        return True
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: List[float], k: int = 4,
+                                                          **kwargs: Any) -> List[Tuple[Document, float]]:
+        """
+        Exact top-k search by cosine similarity.
+
+        Returns:
+            List[Tuple[Document, float]]: (document, cosine distance) pairs, closest first,
+                so scores compare like Chroma's distances (lower is closer)
+        """
+        if self._count == 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+
+        # Apply a metadata equality filter before the search so only matching rows are scored
+        metadata_filter = kwargs.get("filter")
+        if metadata_filter:
+            rows = np.fromiter(
+                (i for i, metadata in enumerate(self.metadatas)
+                 if all(metadata.get(key) == value for key, value in metadata_filter.items())),
+                dtype=np.int64
+            )
+            if rows.size == 0:
+                return []
+            similarities = self.matrix[rows] @ query
+        else:
+            rows = None
+            similarities = self.matrix @ query
+
+        k = min(k, similarities.shape[0])
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [
+            (Document(page_content=self.texts[i], metadata=self.metadatas[i]), float(1.0 - similarities[j]))
+            for j, i in ((j, rows[j] if rows is not None else j) for j in top)
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self.embedding_function.embed_query(query), k, **kwargs
+        )
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    def persist(self) -> None:
+        """Save the matrix and metadata to persist_directory, if one was given."""
+        if not self.persist_directory:
+            return
+        if self._matrix is not None and not self._matrix.flags.writeable:
+            # Still the read-only memory map of the saved file, so nothing has changed
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        np.save(os.path.join(self.persist_directory, self.MATRIX_FILE), np.ascontiguousarray(self.matrix))
+        with open(os.path.join(self.persist_directory, self.METADATA_FILE), 'w') as f:
+            json.dump({"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f)
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(embedding_function=embedding, persist_directory=kwargs.get("persist_directory"))
+        store.add_texts(texts, metadatas)
+        return store